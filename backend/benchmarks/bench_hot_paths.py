@@ -0,0 +1,324 @@
+"""
+Microbenchmarks of the ingest and blog hot-path functions in server.py.
+
+Each function runs over a generated, realistic corpus:
+
+    detect_bot, generate_fingerprint  ~5000 user agents (browsers across OS/version, mobile,
+                                      AI crawlers as they really announce themselves, HTTP
+                                      libraries and headless browsers)
+    analyze_behavior                  a bursty fingerprint stream: mostly one-off visitors
+                                      plus crawlers that fire runs of 10-40 requests
+    get_real_ip                       header sets with Cloudflare, X-Forwarded-For chains,
+                                      X-Real-IP or no proxy at all
+    strip_html,
+    process_blog_content              article HTML from 10 KB to 500 KB
+    generate_slug                     ~2000 post titles with punctuation and unicode
+
+and reports ns/op (best of --repeat timed passes) and allocations per op, measured with
+tracemalloc as the peak bytes allocated during one call and the bytes still held after it.
+
+Thresholds live in hot_path_thresholds.json (ns/op and peak bytes/op per function). The run
+fails (exit 1) when any function exceeds its threshold, so a slower hot path shows up in CI.
+Timings are machine dependent: regenerate the file on the machine that enforces it with
+--update-thresholds, which records the current numbers times --headroom.
+
+Usage:
+    python benchmarks/bench_hot_paths.py                       # run and check thresholds
+    python benchmarks/bench_hot_paths.py --only detect_bot get_real_ip
+    python benchmarks/bench_hot_paths.py --update-thresholds --headroom 2.0
+    python benchmarks/bench_hot_paths.py --json results.json   # also save the numbers
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "aibot_detect_bench")
+os.environ.setdefault("JWT_SECRET", "bench")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+from simulate_bot_traffic import AI_BOTS, NORMAL_AGENTS, PATHS  # noqa: E402
+
+THRESHOLDS_FILE = Path(__file__).resolve().parent / "hot_path_thresholds.json"
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--only", nargs="+", help="benchmark only these functions")
+parser.add_argument("--repeat", type=int, default=5, help="timed passes; the fastest is reported")
+parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per timed pass")
+parser.add_argument("--alloc-samples", type=int, default=300, help="calls traced for allocations")
+parser.add_argument("--thresholds", default=str(THRESHOLDS_FILE))
+parser.add_argument("--update-thresholds", action="store_true", help="write current results times --headroom")
+parser.add_argument("--headroom", type=float, default=2.0)
+parser.add_argument("--json", help="also write the results to this file")
+parser.add_argument("--seed", type=int, default=7)
+args = parser.parse_args()
+
+rng = random.Random(args.seed)
+
+# Corpora
+
+DESKTOP_OS = [
+    "Windows NT 10.0; Win64; x64", "Windows NT 6.1; Win64; x64", "Macintosh; Intel Mac OS X 10_15_7",
+    "Macintosh; Intel Mac OS X 14_4_1", "X11; Linux x86_64", "X11; Ubuntu; Linux x86_64", "X11; CrOS x86_64 14541.0.0",
+]
+ANDROID_DEVICES = ["Linux; Android 14; Pixel 8", "Linux; Android 13; SM-S918B", "Linux; Android 12; moto g(30)",
+                   "Linux; Android 10; K"]
+IOS_VERSIONS = ["17_4", "16_6", "15_8"]
+AI_CRAWLERS = [
+    "Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; GPTBot/{v}; +https://openai.com/gptbot)",
+    "Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; ChatGPT-User/{v}; +https://openai.com/bot)",
+    "Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; ClaudeBot/{v}; +claudebot@anthropic.com)",
+    "Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; PerplexityBot/{v}; +https://perplexity.ai/perplexitybot)",
+    "Mozilla/5.0 (compatible; Amazonbot/{v}; +https://developer.amazon.com/support/amazonbot)",
+    "Mozilla/5.0 (compatible; bingbot/{v}; +http://www.bing.com/bingbot.htm)",
+    "Mozilla/5.0 (compatible; AhrefsBot/{v}; +http://ahrefs.com/robot/)",
+    "Mozilla/5.0 (compatible; SemrushBot/{v}; +http://www.semrush.com/bot.html)",
+    "meta-externalagent/{v} (+https://developers.facebook.com/docs/sharing/webmasters/crawler)",
+    "CCBot/{v} (https://commoncrawl.org/faq/)",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Version/17.4 Safari/605.1.15 (Applebot/{v}; +http://www.apple.com/go/applebot)",
+]
+TOOLS = [
+    "curl/8.{m}.0", "python-requests/2.{m}.0", "Go-http-client/1.1", "okhttp/4.{m}.0", "axios/1.{m}.2",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) HeadlessChrome/12{m}.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/12{m}.0.0.0 "
+    "Safari/537.36 Puppeteer",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:12{m}.0) Gecko/20100101 Firefox/12{m}.0 Playwright",
+]
+
+
+def browser_agent() -> str:
+    version = rng.randint(100, 126)
+    kind = rng.random()
+    if kind < 0.45:
+        return (f"Mozilla/5.0 ({rng.choice(DESKTOP_OS)}) AppleWebKit/537.36 (KHTML, like Gecko) "
+                f"Chrome/{version}.0.{rng.randint(4000, 6500)}.{rng.randint(0, 200)} Safari/537.36")
+    if kind < 0.55:
+        return (f"Mozilla/5.0 ({rng.choice(DESKTOP_OS)}) AppleWebKit/537.36 (KHTML, like Gecko) "
+                f"Chrome/{version}.0.0.0 Safari/537.36 Edg/{version}.0.{rng.randint(1000, 2500)}.{rng.randint(0, 99)}")
+    if kind < 0.68:
+        return f"Mozilla/5.0 ({rng.choice(DESKTOP_OS)}; rv:{version}.0) Gecko/20100101 Firefox/{version}.0"
+    if kind < 0.8:
+        ios = rng.choice(IOS_VERSIONS)
+        return (f"Mozilla/5.0 (iPhone; CPU iPhone OS {ios} like Mac OS X) AppleWebKit/605.1.15 "
+                f"(KHTML, like Gecko) Version/{ios.split('_')[0]}.0 Mobile/15E148 Safari/604.1")
+    if kind < 0.95:
+        return (f"Mozilla/5.0 ({rng.choice(ANDROID_DEVICES)}) AppleWebKit/537.36 (KHTML, like Gecko) "
+                f"Chrome/{version}.0.{rng.randint(4000, 6500)}.{rng.randint(0, 200)} Mobile Safari/537.36")
+    return rng.choice(NORMAL_AGENTS)
+
+
+def user_agent_corpus(n: int = 5000) -> list:
+    agents = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.7:
+            agents.append(browser_agent())
+        elif kind < 0.88:
+            agents.append(rng.choice(AI_CRAWLERS).format(v=f"1.{rng.randint(0, 3)}"))
+        elif kind < 0.92:
+            agents.append(rng.choice(AI_BOTS)[0])
+        else:
+            agents.append(rng.choice(TOOLS).format(m=rng.randint(0, 9)))
+    return agents
+
+
+def random_ip() -> str:
+    return f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+
+
+def header_corpus(n: int = 5000) -> list:
+    corpus = []
+    for _ in range(n):
+        headers = {"accept": "text/html,application/xhtml+xml", "accept-language": "en-US,en;q=0.9",
+                   "accept-encoding": "gzip, deflate, br", "host": "example.com"}
+        kind = rng.random()
+        if kind < 0.4:
+            headers["cf-connecting-ip"] = random_ip()
+            headers["x-forwarded-for"] = f"{headers['cf-connecting-ip']}, {random_ip()}"
+        elif kind < 0.75:
+            headers["x-forwarded-for"] = ", ".join(random_ip() for _ in range(rng.randint(1, 4)))
+        elif kind < 0.85:
+            headers["x-real-ip"] = random_ip()
+        corpus.append(headers)
+    return corpus
+
+
+def fingerprint_stream(n: int = 20000) -> list:
+    """(fingerprint, path) pairs: one-off visitors interleaved with bursts from crawlers"""
+    crawlers = [f"crawler-{i:03d}" + "0" * 52 for i in range(40)]
+    stream = []
+    while len(stream) < n:
+        if rng.random() < 0.2:
+            crawler = rng.choice(crawlers)
+            paths = PATHS if rng.random() < 0.5 else PATHS[:2]
+            stream.extend((crawler, rng.choice(paths)) for _ in range(rng.randint(10, 40)))
+        else:
+            stream.append((f"visitor-{rng.getrandbits(64):016x}" + "0" * 40, rng.choice(PATHS)))
+    return stream[:n]
+
+
+def article_html(target_bytes: int) -> str:
+    words = ("bots crawlers retrieval augmented generation index latency fingerprint behavior "
+             "detection policy robots sitemap content publishers training data").split()
+    parts = []
+    size = 0
+    section = 0
+    while size < target_bytes:
+        section += 1
+        block = [f"<h2 id=\"s{section}\">Section {section}: {' '.join(rng.sample(words, 3))}</h2>"]
+        for _ in range(rng.randint(3, 6)):
+            sentence = " ".join(rng.choice(words) for _ in range(rng.randint(40, 90)))
+            block.append(f"<p>{sentence} <a href=\"/articles/{section}\">read more</a> "
+                         f"<strong>{rng.choice(words)}</strong> &amp; <em>{rng.choice(words)}</em>.</p>")
+        if section % 3 == 0:
+            block.append("<ul>" + "".join(f"<li>{rng.choice(words)} {rng.choice(words)}</li>" for _ in range(8)) + "</ul>")
+        if section % 5 == 0:
+            block.append("<pre><code>curl -A GPTBot https://example.com/robots.txt</code></pre>")
+        chunk = "\n".join(block)
+        parts.append(chunk)
+        size += len(chunk)
+    return "<article>" + "\n".join(parts) + "</article>"
+
+
+def html_corpus() -> list:
+    return [article_html(size) for size in (10_000, 25_000, 50_000, 100_000, 250_000, 500_000)]
+
+
+def title_corpus(n: int = 2000) -> list:
+    words = ["How", "AI", "crawlers", "read", "your", "site", "in", "2026", "GPTBot's", "new", "rules",
+             "RAG", "vs.", "search", "Why", "robots.txt", "isn't", "enough", "Café", "naïve", "data",
+             "—", "&", "100%", "(part 2)", "Q&A:", "LLM", "pre-fetching", "explained!"]
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(4, 14))) for _ in range(n)]
+
+
+# Benchmarks: name -> (function, list of argument tuples, setup run before every pass)
+
+def reset_history():
+    server.REQUEST_HISTORY.clear()
+
+
+def build_cases() -> dict:
+    agents = user_agent_corpus()
+    headers = header_corpus()
+    html = html_corpus()
+    return {
+        "detect_bot": (server.detect_bot, [(ua, random_ip()) for ua in agents], None),
+        "generate_fingerprint": (
+            server.generate_fingerprint,
+            [(ua, headers[i % len(headers)], random_ip()) for i, ua in enumerate(agents)], None),
+        "analyze_behavior": (server.analyze_behavior, fingerprint_stream(), reset_history),
+        "get_real_ip": (server.get_real_ip, [(h, "10.0.0.1") for h in headers], None),
+        "strip_html": (server.strip_html, [(doc,) for doc in html], None),
+        "process_blog_content": (server.process_blog_content, [(doc,) for doc in html], None),
+        "generate_slug": (server.generate_slug, [(title,) for title in title_corpus()], None),
+    }
+
+
+def time_pass(fn, inputs, setup) -> float:
+    """ns/op of one or more passes over inputs lasting at least --min-time"""
+    ops = 0
+    elapsed = 0
+    while elapsed < args.min_time * 1e9:
+        if setup:
+            setup()
+        started = time.perf_counter_ns()
+        for call_args in inputs:
+            fn(*call_args)
+        elapsed += time.perf_counter_ns() - started
+        ops += len(inputs)
+    return elapsed / ops
+
+
+def measure_allocations(fn, inputs, setup) -> tuple:
+    """(average peak bytes allocated during a call, average bytes still held after it)"""
+    if setup:
+        setup()
+    samples = inputs[:args.alloc_samples]
+    peak_total = 0
+    tracemalloc.start()
+    start_current, _ = tracemalloc.get_traced_memory()
+    for call_args in samples:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn(*call_args)
+        _, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - before
+        del result
+    end_current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak_total / len(samples), max(0, end_current - start_current) / len(samples)
+
+
+def run_case(fn, inputs, setup) -> dict:
+    gc.collect()
+    time_pass(fn, inputs[:200], setup)  # warm up
+    gc.disable()
+    try:
+        ns_per_op = min(time_pass(fn, inputs, setup) for _ in range(args.repeat))
+    finally:
+        gc.enable()
+    peak_bytes, retained_bytes = measure_allocations(fn, inputs, setup)
+    return {
+        "ns_per_op": round(ns_per_op, 1),
+        "peak_bytes_per_op": round(peak_bytes, 1),
+        "retained_bytes_per_op": round(retained_bytes, 1),
+        "corpus_size": len(inputs),
+    }
+
+
+def main() -> int:
+    cases = build_cases()
+    names = args.only or list(cases)
+    unknown = set(names) - set(cases)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    thresholds_path = Path(args.thresholds)
+    thresholds = json.loads(thresholds_path.read_text()) if thresholds_path.exists() else {}
+
+    results = {}
+    failures = []
+    print(f"{'function':<24}{'ns/op':>14}{'peak B/op':>14}{'held B/op':>12}  threshold")
+    for name in names:
+        fn, inputs, setup = cases[name]
+        result = results[name] = run_case(fn, inputs, setup)
+        limit = thresholds.get(name, {})
+        verdict = "-"
+        if limit and not args.update_thresholds:
+            over = [key for key, field in (("ns/op", "ns_per_op"), ("peak B/op", "peak_bytes_per_op"))
+                    if field in limit and result[field] > limit[field]]
+            verdict = f"FAIL ({', '.join(over)})" if over else "ok"
+            if over:
+                failures.append(name)
+        print(f"{name:<24}{result['ns_per_op']:>14,.1f}{result['peak_bytes_per_op']:>14,.1f}"
+              f"{result['retained_bytes_per_op']:>12,.1f}  {verdict}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+    if args.update_thresholds:
+        for name, result in results.items():
+            thresholds[name] = {
+                "ns_per_op": round(result["ns_per_op"] * args.headroom),
+                "peak_bytes_per_op": round(result["peak_bytes_per_op"] * args.headroom),
+            }
+        thresholds_path.write_text(json.dumps(thresholds, indent=2, sort_keys=True) + "\n")
+        print(f"Thresholds written to {thresholds_path} ({args.headroom}x current)")
+        return 0
+
+    if failures:
+        print(f"Regression: {', '.join(failures)} exceeded {thresholds_path.name}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
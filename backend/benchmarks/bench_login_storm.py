@@ -0,0 +1,116 @@
+"""
+Ingest latency during a login storm.
+
+Simulated ingest requests (bot detection, fingerprinting and behavior analysis plus
+an await per I/O step, like log_traffic) arrive at a fixed rate while a burst of
+concurrent logins verifies bcrypt passwords. The same storm is run twice:
+
+    inline  - verify_password called directly in the handler (the old behaviour)
+    pool    - run_password_job, bcrypt on the process pool behind a semaphore
+
+and the ingest latency percentiles of both runs are printed side by side.
+
+Usage:
+    python benchmarks/bench_login_storm.py [--logins 40] [--rate 500] [--rounds 12]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--logins", type=int, default=40, help="concurrent logins in the storm")
+parser.add_argument("--rate", type=int, default=500, help="ingest requests per second")
+parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+parser.add_argument("--workers", type=int, default=2, help="password hashing processes")
+args = parser.parse_args()
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "aibot_detect_bench")
+os.environ.setdefault("JWT_SECRET", "bench")
+os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+HEADERS = {"accept": "text/html", "accept-language": "en-US", "accept-encoding": "gzip"}
+
+
+async def ingest_request(i: int) -> None:
+    ua = "Mozilla/5.0 (compatible; GPTBot/1.0; +https://openai.com/gptbot)"
+    ip = f"52.{i % 255}.1.1"
+    await asyncio.sleep(0)                      # domain / key lookup
+    server.detect_bot(ua, ip)
+    fingerprint = server.generate_fingerprint(ua, HEADERS, ip)
+    server.analyze_behavior(fingerprint, f"/articles/{i % 50}")
+    await asyncio.sleep(0)                      # insert
+
+
+async def inline_login(password: str, hashed: str) -> None:
+    server.verify_password(password, hashed)
+
+
+async def pooled_login(password: str, hashed: str) -> None:
+    await server.run_password_job(server.verify_password, password, hashed)
+
+
+async def storm(login, hashed: str) -> list:
+    latencies = []
+    interval = 1.0 / args.rate
+    stop = asyncio.Event()
+
+    async def one(i: int, scheduled: float):
+        await ingest_request(i)
+        latencies.append(time.perf_counter() - scheduled)
+
+    async def ingest_driver():
+        tasks = []
+        start = time.perf_counter()
+        i = 0
+        while not stop.is_set():
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(i, scheduled)))
+            i += 1
+        await asyncio.gather(*tasks)
+
+    driver = asyncio.create_task(ingest_driver())
+    await asyncio.sleep(0.2)  # steady state before the storm
+    storm_started = time.perf_counter()
+    await asyncio.gather(*(login("Password123", hashed) for _ in range(args.logins)))
+    storm_seconds = time.perf_counter() - storm_started
+    await asyncio.sleep(0.2)
+    stop.set()
+    await driver
+    return latencies, storm_seconds
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def main():
+    hashed = server.hash_password("Password123")
+    # Start the pool processes outside the measured window
+    await server.run_password_job(server.verify_password, "Password123", hashed)
+
+    print(f"{args.logins} concurrent logins, bcrypt rounds={args.rounds}, ingest at {args.rate} req/s\n")
+    print(f"{'mode':<8}{'storm s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, login in (("inline", inline_login), ("pool", pooled_login)):
+        latencies, storm_seconds = await storm(login, hashed)
+        ms = [v * 1000 for v in latencies]
+        print(f"{name:<8}{storm_seconds:>10.2f}{statistics.median(ms):>10.2f}"
+              f"{percentile(ms, 95):>10.2f}{percentile(ms, 99):>10.2f}{max(ms):>10.2f}")
+
+    server.PASSWORD_EXECUTOR.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
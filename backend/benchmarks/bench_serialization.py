@@ -0,0 +1,131 @@
+"""
+Per-row serialization cost of list endpoints: the original path (parse ISO dates,
+build a pydantic model per row, let FastAPI re-validate through response_model and
+encode with the stdlib json) against the lean path (projected rows rendered by orjson).
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows 1000] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import List
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "aibot_detect_bench")
+os.environ.setdefault("JWT_SECRET", "bench")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+import server  # noqa: E402
+
+
+def make_traffic_rows(n: int) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    return [{
+        "id": str(uuid.uuid4()),
+        "domain_id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "ip_address": f"52.{i % 255}.{(i * 7) % 255}.{(i * 13) % 255}",
+        "user_agent": "Mozilla/5.0 (compatible; GPTBot/1.0; +https://openai.com/gptbot)",
+        "detected_bot": "GPTBot" if i % 3 else None,
+        "bot_provider": "AI / RAG Bot",
+        "fingerprint": uuid.uuid4().hex * 2,
+        "behavior_type": "normal",
+        "confidence_score": 0.7,
+        "risk_level": "medium",
+        "geo_location": {"country": "United States", "city": "San Francisco", "region": "California",
+                         "lat": 37.7749, "lon": -122.4194, "isp": "Amazon AWS"},
+        "request_path": f"/articles/{i}",
+        "request_method": "GET",
+        "timestamp": (now - timedelta(seconds=i)).isoformat(),
+    } for i in range(n)]
+
+
+def make_blog_rows(n: int) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    return [{
+        "id": str(uuid.uuid4()),
+        "title": f"Post {i}",
+        "slug": f"post-{i}",
+        "content": "<p>" + "lorem ipsum dolor sit amet " * 400 + "</p>",
+        "excerpt": "lorem ipsum dolor sit amet " * 5,
+        "featured_image": None,
+        "author_id": str(uuid.uuid4()),
+        "author_name": "admin",
+        "status": "published",
+        "seo_title": None,
+        "seo_description": None,
+        "seo_keywords": [],
+        "tags": ["ai", "bots"],
+        "view_count": i,
+        "reading_time": 3,
+        "published_at": (now - timedelta(days=i)).isoformat(),
+        "created_at": (now - timedelta(days=i)).isoformat(),
+        "updated_at": (now - timedelta(days=i)).isoformat(),
+    } for i in range(n)]
+
+
+def project(rows: List[dict], projection: dict) -> List[dict]:
+    """Emulate a Mongo projection so the lean path only sees the response fields"""
+    fields = [k for k, v in projection.items() if v and k != "_id"]
+    return [{k: row[k] for k in fields if k in row} for row in rows]
+
+
+def legacy_path(rows: List[dict], model, date_fields) -> bytes:
+    rows = [dict(r) for r in rows]
+    for row in rows:
+        for field in date_fields:
+            if row.get(field) and isinstance(row[field], str):
+                row[field] = datetime.fromisoformat(row[field])
+    models = [model(**row) for row in rows]
+    # What FastAPI does with response_model before handing the result to JSONResponse
+    validated = TypeAdapter(List[model]).validate_python(models, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def lean_path(rows: List[dict]) -> bytes:
+    return server.OrjsonResponse(rows).body
+
+
+def bench(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ("traffic_logs", make_traffic_rows(args.rows), server.TrafficLogResponse,
+         server.TRAFFIC_LOG_PROJECTION, ["timestamp"]),
+        ("blogs", make_blog_rows(args.rows), server.BlogListResponse,
+         server.BLOG_LIST_PROJECTION, ["created_at", "updated_at", "published_at"]),
+    ]
+
+    print(f"{'endpoint rows':<16}{'before us/row':>16}{'after us/row':>16}{'speedup':>10}")
+    for name, raw_rows, model, projection, date_fields in cases:
+        projected = project(raw_rows, projection)
+        before = bench(lambda: legacy_path(raw_rows, model, date_fields), args.repeat)
+        after = bench(lambda: lean_path(projected), args.repeat)
+        per_before = before / args.rows * 1e6
+        per_after = after / args.rows * 1e6
+        print(f"{name:<16}{per_before:>16.2f}{per_after:>16.2f}{per_before / per_after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
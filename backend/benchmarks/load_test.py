@@ -0,0 +1,267 @@
+"""
+End-to-end load test of the ingest endpoint (/api/traffic/log).
+
+Replays a mix of AI-bot and browser traffic, built from the user agents and paths in
+simulate_bot_traffic.py, at a fixed concurrency and reports throughput plus
+p50/p95/p99 latency. Two ways to run the app:
+
+    memory  - server.py in this process on an in-memory Mongo stand-in (mongomock-motor,
+              from requirements-dev.txt), driven through httpx's ASGI transport. Needs no
+              database; measures the app's own overhead, not Mongo.
+    mongo   - server.py under uvicorn in a subprocess against a real Mongo (--mongo-url),
+              driven over HTTP. Uses a throwaway database that is dropped afterwards.
+
+Geo lookups call ip-api.com, so they are replaced by a stub unless --real-geo is given
+(memory mode only; in mongo mode the server does real lookups).
+
+Results are written as JSON (--output) so runs can be compared across versions; pass an
+earlier result with --compare to print the difference.
+
+Usage:
+    pip install -r requirements-dev.txt
+    python benchmarks/load_test.py [--requests 5000] [--concurrency 50] [--bot-ratio 0.4]
+    python benchmarks/load_test.py --mode mongo --mongo-url mongodb://localhost:27017
+    python benchmarks/load_test.py --compare benchmarks/results/load_test-<before>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import secrets
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from simulate_bot_traffic import AI_BOTS, NORMAL_AGENTS, PATHS  # noqa: E402
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--mode", choices=["memory", "mongo"], default="memory")
+parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+parser.add_argument("--port", type=int, default=8765, help="uvicorn port in mongo mode")
+parser.add_argument("--requests", type=int, default=5000, help="measured requests")
+parser.add_argument("--warmup", type=int, default=200, help="requests sent before measuring")
+parser.add_argument("--concurrency", type=int, default=50, help="requests in flight")
+parser.add_argument("--bot-ratio", type=float, default=0.4, help="share of AI-bot requests")
+parser.add_argument("--clients", type=int, default=500, help="distinct client IPs (fingerprints)")
+parser.add_argument("--seed", type=int, default=1)
+parser.add_argument("--real-geo", action="store_true", help="keep ip-api.com geo lookups (memory mode)")
+parser.add_argument("--output", help="result file (default benchmarks/results/load_test-<time>.json)")
+parser.add_argument("--compare", help="earlier result file to compare against")
+args = parser.parse_args()
+
+BROWSER_HEADERS = {
+    "accept": "text/html,application/xhtml+xml",
+    "accept-language": "en-US,en;q=0.9",
+    "accept-encoding": "gzip, deflate, br",
+}
+
+
+def build_traffic(n: int, domain: str, api_key: str, rng: random.Random) -> list:
+    """(headers, body) pairs; each simulated client keeps its IP and user agent, so repeat
+    visits share a fingerprint and exercise behavior analysis"""
+    clients = []
+    for i in range(args.clients):
+        if rng.random() < args.bot_ratio:
+            user_agent = rng.choice(AI_BOTS)[0]
+            ip = f"{rng.randint(13, 52)}.{rng.randint(1, 255)}.{rng.randint(1, 255)}.{rng.randint(1, 255)}"
+            headers = {"accept": "*/*"}
+        else:
+            user_agent = rng.choice(NORMAL_AGENTS)
+            ip = f"{rng.randint(100, 200)}.{rng.randint(1, 255)}.{rng.randint(1, 255)}.{rng.randint(1, 255)}"
+            headers = BROWSER_HEADERS
+        clients.append((user_agent, ip, headers))
+
+    traffic = []
+    for _ in range(n):
+        user_agent, ip, headers = rng.choice(clients)
+        traffic.append((headers, {
+            "domain": domain,
+            "api_key": api_key,
+            "ip_address": ip,
+            "user_agent": user_agent,
+            "request_path": rng.choice(PATHS),
+            "request_method": "GET",
+        }))
+    return traffic
+
+
+async def seed(db) -> tuple:
+    """A user with a verified domain and an API key; returns (domain, api key)"""
+    now = datetime.now(timezone.utc).isoformat()
+    user_id = str(uuid.uuid4())
+    domain = f"loadtest-{uuid.uuid4().hex[:8]}.example"
+    api_key = f"abk_{secrets.token_urlsafe(32)}"
+    await db.users.insert_one({"id": user_id, "email": f"{domain}@loadtest.example", "password_hash": None,
+                               "is_super_admin": False, "plan": "free", "created_at": now})
+    await db.domains.insert_one({"id": str(uuid.uuid4()), "user_id": user_id, "domain": domain,
+                                 "verification_token": secrets.token_urlsafe(16), "is_verified": True,
+                                 "verified_at": now, "created_at": now})
+    await db.api_keys.insert_one({"id": str(uuid.uuid4()), "user_id": user_id, "key": api_key,
+                                  "name": "load test", "is_active": True, "created_at": now})
+    return domain, api_key
+
+
+async def replay(http: httpx.AsyncClient, traffic: list) -> dict:
+    latencies = []
+    statuses = Counter()
+    errors = Counter()
+    pending = iter(traffic)
+
+    async def worker():
+        for headers, body in pending:
+            started = time.perf_counter()
+            try:
+                response = await http.post("/api/traffic/log", json=body, headers=headers)
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"elapsed": elapsed, "latencies": latencies, "statuses": statuses, "errors": errors}
+
+
+def summarize(run: dict) -> dict:
+    latencies_ms = sorted(latency * 1000 for latency in run["latencies"])
+    cuts = statistics.quantiles(latencies_ms, n=100, method="inclusive") if len(latencies_ms) > 1 else latencies_ms * 99
+    total = sum(run["statuses"].values()) + sum(run["errors"].values())
+    return {
+        "requests": total,
+        "elapsed_seconds": round(run["elapsed"], 3),
+        "throughput_rps": round(total / run["elapsed"], 1) if run["elapsed"] else 0.0,
+        "latency_ms": {
+            "p50": round(cuts[49], 3),
+            "p95": round(cuts[94], 3),
+            "p99": round(cuts[98], 3),
+            "max": round(latencies_ms[-1], 3) if latencies_ms else None,
+            "mean": round(statistics.fmean(latencies_ms), 3) if latencies_ms else None,
+        },
+        "status_codes": {str(code): count for code, count in sorted(run["statuses"].items())},
+        "errors": dict(run["errors"]),
+    }
+
+
+async def run_memory(traffic_for) -> dict:
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "aibot_detect_loadtest")
+    os.environ.setdefault("JWT_SECRET", "loadtest")
+    from mongomock_motor import AsyncMongoMockClient
+    import server
+
+    server.client = AsyncMongoMockClient()
+    server.db = server.client[os.environ["DB_NAME"]]
+    if not args.real_geo:
+        server.get_geo_location = lambda ip: None
+
+    domain, api_key = await seed(server.db)
+    warmup, traffic = traffic_for(domain, api_key)
+    async with server.lifespan(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as http:
+            await replay(http, warmup)
+            return await replay(http, traffic)
+
+
+async def run_mongo(traffic_for) -> dict:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    db_name = f"aibot_detect_loadtest_{uuid.uuid4().hex[:8]}"
+    mongo = AsyncIOMotorClient(args.mongo_url)
+    env = {**os.environ, "MONGO_URL": args.mongo_url, "DB_NAME": db_name,
+           "JWT_SECRET": os.environ.get("JWT_SECRET", "loadtest")}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(args.port), "--no-access-log",
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        domain, api_key = await seed(mongo[db_name])
+        warmup, traffic = traffic_for(domain, api_key)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=30) as http:
+            for _ in range(120):
+                try:
+                    if (await http.get("/api/health/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.5)
+            else:
+                raise RuntimeError("server did not become ready")
+            await replay(http, warmup)
+            return await replay(http, traffic)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        await mongo.drop_database(db_name)
+        mongo.close()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_comparison(result: dict, baseline: dict):
+    print(f"\nCompared with {baseline.get('revision')} ({baseline.get('finished_at')})")
+    rows = [("throughput_rps", result["throughput_rps"], baseline["summary"]["throughput_rps"])]
+    rows += [(f"{p} ms", result["latency_ms"][p], baseline["summary"]["latency_ms"][p]) for p in ("p50", "p95", "p99")]
+    for name, now, before in rows:
+        change = f"{(now - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"  {name:<15} {before:>10} -> {now:<10} {change}")
+
+
+def main():
+    rng = random.Random(args.seed)
+
+    def traffic_for(domain, api_key):
+        return build_traffic(args.warmup, domain, api_key, rng), build_traffic(args.requests, domain, api_key, rng)
+
+    run = asyncio.run(run_memory(traffic_for) if args.mode == "memory" else run_mongo(traffic_for))
+    summary = summarize(run)
+
+    print(f"{args.mode} mode, {summary['requests']} requests, concurrency {args.concurrency}, "
+          f"bot ratio {args.bot_ratio}")
+    print(f"  throughput   {summary['throughput_rps']} req/s over {summary['elapsed_seconds']}s")
+    latency = summary["latency_ms"]
+    print(f"  latency ms   p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+    print(f"  status codes {summary['status_codes']}" + (f"  errors {summary['errors']}" if summary["errors"] else ""))
+
+    result = {
+        "revision": git_revision(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "summary": summary,
+    }
+    output = Path(args.output) if args.output else (
+        Path(__file__).resolve().parent / "results" / f"load_test-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"  saved to {output}")
+
+    if args.compare:
+        print_comparison(summary, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
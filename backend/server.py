@@ -1,8 +1,11 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Request, Header
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Request, Response, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import os
 import logging
 from pathlib import Path
@@ -14,15 +17,30 @@ import jwt
 from passlib.context import CryptContext
 import secrets
 import requests
-from collections import Counter
+from collections import Counter, deque
 import re
 from html.parser import HTMLParser
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 import hashlib
 import json
+import base64
+import heapq
+import itertools
+import orjson
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import bisect
+import random
+import sys
+import threading
+import socket
+import traceback
+import ssl
+import httpx
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from email.utils import format_datetime, parsedate_to_datetime
 
 # code update by Subhro Logger was deined too late earlier
 # Configure logging FIRST
@@ -32,17 +50,158 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+logging.getLogger("httpx").setLevel(logging.WARNING)  # it logs every verification fetch at INFO
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Mongo command monitoring: every database command is timed and attributed to its collection and
+# normalized query shape (values replaced by "?"), feeding the aibot_mongo_* metrics and the
+# slow-query log behind /api/admin/mongo-stats. Set MONGO_COMMAND_MONITORING=false to turn off.
+MONGO_COMMAND_MONITORING = os.environ.get('MONGO_COMMAND_MONITORING', 'true').lower() != 'false'
+MONGO_SLOW_QUERY_MS = float(os.environ.get('MONGO_SLOW_QUERY_MS', 100))
+MONGO_SHAPE_LIMIT = 1000  # distinct shapes tracked; later ones are folded into "(other)"
+# Commands that don't touch collection data
+MONGO_IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue",
+                          "endSessions", "buildInfo", "killCursors", "listCollections", "listIndexes"}
+# Where each command keeps its filter
+MONGO_FILTER_FIELDS = {"find": "filter", "count": "query", "distinct": "query", "findAndModify": "query"}
+
+def query_shape(value):
+    """A filter with every value replaced by "?", keeping field names and operators"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        shapes = [query_shape(item) for item in value if isinstance(item, (dict, list))]
+        return shapes or "?"
+    return "?"
+
+def command_shape(name: str, command: dict) -> str:
+    if name in MONGO_FILTER_FIELDS:
+        shape = query_shape(command.get(MONGO_FILTER_FIELDS[name]) or {})
+    elif name == "aggregate":
+        shape = [{stage: query_shape(spec) if stage == "$match" else "..."}
+                 for item in command.get("pipeline", []) for stage, spec in item.items()]
+    elif name in ("update", "delete"):
+        statements = command.get(f"{name}s") or [{}]
+        shape = query_shape(statements[0].get("q", {}))
+        if len(statements) > 1:
+            shape = {"bulk": len(statements), "q": shape}
+    else:
+        return ""
+    if name == "find" and command.get("sort"):
+        shape = {"filter": shape, "sort": dict(command["sort"])}
+    return json.dumps(shape, default=str)
+
+class MongoCommandMonitor(monitoring.CommandListener):
+    """Times Mongo commands by (command, collection, shape). Called from the driver's threads."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending: Dict[tuple, tuple] = {}
+        self.shapes: Dict[tuple, dict] = {}   # (command, collection, shape) -> totals
+        self.recent_slow = deque(maxlen=1000)  # rolling window the slow-shape ranking is built from
+
+    def started(self, event):
+        if event.command_name in MONGO_IGNORED_COMMANDS:
+            return
+        command = event.command
+        if event.command_name == "getMore":
+            collection = command.get("collection", "")
+        else:
+            collection = command.get(event.command_name)
+            collection = collection if isinstance(collection, str) else ""
+        shape = command_shape(event.command_name, command)
+        with self.lock:
+            self.pending[(event.connection_id, event.request_id)] = (collection, shape)
+
+    def succeeded(self, event):
+        self.record(event, failed=False)
+
+    def failed(self, event):
+        self.record(event, failed=True)
+
+    def record(self, event, failed: bool):
+        with self.lock:
+            pending = self.pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        collection, shape = pending
+        seconds = event.duration_micros / 1_000_000
+        key = (event.command_name, collection, shape)
+        with self.lock:
+            MONGO_COMMAND_SECONDS.observe(seconds, event.command_name, collection)
+            if failed:
+                MONGO_COMMAND_FAILURES.inc(event.command_name, collection)
+            if key not in self.shapes and len(self.shapes) >= MONGO_SHAPE_LIMIT:
+                key = (event.command_name, collection, "(other)")
+            stats = self.shapes.get(key)
+            if stats is None:
+                stats = self.shapes[key] = {"count": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0}
+            stats["count"] += 1
+            stats["failures"] += failed
+            stats["total_ms"] += seconds * 1000
+            stats["max_ms"] = max(stats["max_ms"], seconds * 1000)
+            if seconds * 1000 >= MONGO_SLOW_QUERY_MS:
+                self.recent_slow.append((key, seconds * 1000, time.time()))
+                MONGO_SLOW_COMMANDS.inc(event.command_name, collection)
+        if seconds * 1000 >= MONGO_SLOW_QUERY_MS:
+            logger.warning(f"Slow Mongo {event.command_name} on {collection} took {seconds * 1000:.0f}ms: {shape}")
+
+    def reset(self):
+        with self.lock:
+            self.shapes.clear()
+            self.recent_slow.clear()
+
+    def report(self, limit: int) -> dict:
+        def describe(key, stats):
+            command, collection, shape = key
+            return {"command": command, "collection": collection, "shape": shape, **stats,
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 3) if stats.get("count") else None}
+
+        with self.lock:
+            shapes = list(self.shapes.items())
+            slow = list(self.recent_slow)
+        slow_by_shape: Dict[tuple, dict] = {}
+        for key, ms, _ in slow:
+            entry = slow_by_shape.setdefault(key, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+        return {
+            "slow_threshold_ms": MONGO_SLOW_QUERY_MS,
+            "top_by_total_time": [describe(key, stats) for key, stats in
+                                  sorted(shapes, key=lambda item: item[1]["total_ms"], reverse=True)[:limit]],
+            "top_by_count": [describe(key, stats) for key, stats in
+                             sorted(shapes, key=lambda item: item[1]["count"], reverse=True)[:limit]],
+            "top_slow": [describe(key, stats) for key, stats in
+                         sorted(slow_by_shape.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:limit]],
+        }
+
+MONGO_MONITOR = MongoCommandMonitor()
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MONGO_MONITOR] if MONGO_COMMAND_MONITORING else [])
 db = client[os.environ['DB_NAME']]
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt costs tens to hundreds of ms per call, so hashing runs on a small process pool
+# (see run_password_job) instead of blocking the event loop that also serves ingest.
+# The pool starts its workers lazily, long after the server has started threads, so they
+# come from a forkserver (or spawn) rather than a fork of this process, which could copy a
+# lock another thread holds (logging, passlib) and hang the child.
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', 8))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+PASSWORD_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+def new_password_executor() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS,
+                               mp_context=multiprocessing.get_context(PASSWORD_START_METHOD))
+
+PASSWORD_EXECUTOR = new_password_executor()
+PASSWORD_SEMAPHORE = asyncio.Semaphore(PASSWORD_HASH_CONCURRENCY)
 security = HTTPBearer()
 # code change by subhro problem with earlier code (JWT secret is randomly generated on each server restart if not in environment)
 JWT_SECRET = os.environ.get('JWT_SECRET')
@@ -63,36 +222,39 @@ from contextlib import asynccontextmanager
 async def lifespan(app: FastAPI):
     # code update by Subhro (No database indexes are created before. This will cause slow queries as data grows line 57-67 added)
     # Startup
-    # Create indexes for better query performance
-    await db.users.create_index("email", unique=True)
-    await db.users.create_index("google_id")
-    await db.domains.create_index([("user_id", 1), ("domain", 1)])
-    await db.domains.create_index("is_verified")
-    await db.api_keys.create_index([("user_id", 1), ("key", 1)])
-    await db.traffic_logs.create_index([("user_id", 1), ("timestamp", -1)])
-    await db.traffic_logs.create_index("domain_id")
-    await db.traffic_logs.create_index("detected_bot")
-    await db.blogs.create_index("slug", unique=True)
-    await db.blogs.create_index([("status", 1), ("published_at", -1)])
-    await db.traffic_logs.create_index("fingerprint")
-    await db.traffic_logs.create_index("behavior_type")
-    await db.traffic_logs.create_index("timestamp")
-    await db.api_keys.create_index("key", unique=True)
-    await db.api_keys.create_index("is_active")
-    await db.bot_policies.create_index("bot_name", unique=True)
-    logger.info("Database indexes created")
-
+    # Index management and cache warm-up run in the background so the app accepts
+    # traffic immediately; /api/health/ready reports when they are done
     # START CLEANUP TASK HERE (code update by Subhro)
-    cleanup_task = asyncio.create_task(cleanup_request_history())
-    logger.info("Cleanup task started")
+    get_verify_http_client()
+    background_tasks = [
+        asyncio.create_task(warm_up()),
+        asyncio.create_task(cleanup_request_history()),
+        asyncio.create_task(retention_loop()),
+        asyncio.create_task(admin_stats_loop()),
+        asyncio.create_task(blog_view_flush_loop()),
+        asyncio.create_task(reverification_loop()),
+        asyncio.create_task(loop_heartbeat()),
+    ]
+    LOOP_WATCHDOG.start()
+    logger.info("Background tasks started")
     yield
     # Shutdown
-    cleanup_task.cancel()
-    try:
-        await cleanup_task
-    except asyncio.CancelledError:
-        logger.info("Cleanup task cancelled")
+    for task in background_tasks:
+        task.cancel()
+    for task in background_tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    LOOP_WATCHDOG.stop()
+    logger.info("Background tasks cancelled")
+    # Persist buffered counters before the process goes away
+    await flush_blog_views()
+    await flush_traffic_counters()
+    if VERIFY_HTTP_CLIENT is not None:
+        await VERIFY_HTTP_CLIENT.aclose()
     GEO_EXECUTOR.shutdown(wait=True) 
+    PASSWORD_EXECUTOR.shutdown(wait=True)
     client.close()
 
 # Create the main app without a prefix
@@ -107,6 +269,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "Last-Modified", "X-Profile-Id"],
 )
 
 # code update by Subhro adding global memory for BEHAVIORAL (RAG) ANALYSIS
@@ -116,6 +279,181 @@ import time
 REQUEST_HISTORY = defaultdict(list)
 GEO_EXECUTOR = ThreadPoolExecutor(max_workers=5)
 
+class TTLCache:
+    """Small in-process cache with per-entry expiry and hit/miss counters"""
+    MISSING = object()
+
+    def __init__(self, ttl: float, maxsize: int = 10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries: Dict[Any, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return self.MISSING
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        if len(self.entries) >= self.maxsize and key not in self.entries:
+            # Evict the oldest entry (dicts keep insertion order)
+            self.entries.pop(next(iter(self.entries)))
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+# Ingest lookup caches. Entries also cache "not found" (None) and are invalidated by the
+# routes that change them; CACHE_TTL bounds staleness across workers.
+CACHE_TTL = float(os.environ.get('CACHE_TTL_SECONDS', 60))
+CACHE_WARM_LIMIT = int(os.environ.get('CACHE_WARM_LIMIT', 10000))
+USER_CACHE = TTLCache(float(os.environ.get('USER_CACHE_TTL_SECONDS', 30)))  # user id -> user doc
+DOMAIN_CACHE = TTLCache(CACHE_TTL)     # domain name -> verified domain doc
+API_KEY_CACHE = TTLCache(CACHE_TTL)    # key -> active api key doc
+BOT_POLICIES: Dict[str, dict] = {}     # bot_name -> policy doc, reloaded every CACHE_TTL
+_bot_policies_loaded_at = 0.0
+
+STARTUP_STATUS = {
+    "indexes": "pending",
+    "index_errors": [],
+    "caches": "pending",
+}
+
+# Metrics in the Prometheus text format, served by /api/metrics. Updating one is a dict
+# lookup and an integer increment, so they stay on in production.
+# They live in each process: under `uvicorn --workers N` a scrape is answered by whichever
+# worker accepts the connection. Every series therefore carries a worker label (the pid), so
+# each worker's counters stay monotonic on their own; aggregate with sum without (worker) over
+# rate()/increase() rather than reading raw values.
+METRICS: List[Any] = []  # everything rendered by /api/metrics, in registration order
+METRICS_WORKER = str(os.getpid())
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(names: tuple, values: tuple) -> str:
+    pairs = [("worker", METRICS_WORKER)] + list(zip(names, values))
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs) + "}"
+
+# Metrics are updated from threads as well as the event loop (Mongo command monitoring runs on
+# driver threads, the loop watchdog on its own), so each metric guards its series with a lock
+# and render works on a copy.
+class MetricCounter:
+    """Monotonic counter, optionally split by labels"""
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values = Counter()
+        self.lock = threading.Lock()
+        METRICS.append(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        with self.lock:
+            self.values[label_values] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            values = list(self.values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class MetricHistogram:
+    """Cumulative-bucket histogram, optionally split by labels"""
+    def __init__(self, name: str, help_text: str, buckets: tuple, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.labels = labels
+        self.series: Dict[tuple, list] = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+        METRICS.append(self)
+
+    def observe(self, value: float, *label_values):
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bucket] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            snapshot = [(label_values, list(series)) for label_values, series in self.series.items()]
+        for label_values, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                labels = format_labels(self.labels + ("le",), label_values + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricGauge:
+    """Value read at scrape time; read() returns a number or {label values: number}.
+    metric_type="counter" exposes a running total kept elsewhere (e.g. TTLCache.hits)."""
+    def __init__(self, name: str, help_text: str, read, labels: tuple = (), metric_type: str = "gauge"):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+        self.labels = labels
+        self.metric_type = metric_type
+        METRICS.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        value = self.read()
+        if isinstance(value, dict):
+            for label_values, item in value.items():
+                lines.append(f"{self.name}{format_labels(self.labels, label_values)} {item}")
+        else:
+            lines.append(f"{self.name}{format_labels((), ())} {value}")
+        return lines
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+INGEST_STAGE_SECONDS = MetricHistogram(
+    "aibot_ingest_stage_seconds", "Time spent in each stage of log_traffic", LATENCY_BUCKETS, ("stage",))
+INGEST_SECONDS = MetricHistogram(
+    "aibot_ingest_seconds", "Total log_traffic handling time by outcome", LATENCY_BUCKETS, ("outcome",))
+INGEST_BOTS = MetricCounter("aibot_ingest_detected_bot_total", "Ingested events by detected bot", ("detected_bot",))
+INGEST_BEHAVIORS = MetricCounter("aibot_ingest_behavior_total", "Ingested events by behavior type", ("behavior_type",))
+INGEST_RISK = MetricCounter("aibot_ingest_risk_level_total", "Ingested events by risk level", ("risk_level",))
+
+MONGO_COMMAND_SECONDS = MetricHistogram(
+    "aibot_mongo_command_seconds", "Mongo command duration", LATENCY_BUCKETS, ("command", "collection"))
+MONGO_COMMAND_FAILURES = MetricCounter(
+    "aibot_mongo_command_failures_total", "Mongo commands that failed", ("command", "collection"))
+MONGO_SLOW_COMMANDS = MetricCounter(
+    "aibot_mongo_slow_commands_total", "Mongo commands slower than MONGO_SLOW_QUERY_MS", ("command", "collection"))
+
+def observe_stage(stage: str, started: float) -> float:
+    """Record the time since started for an ingest stage; returns now, the start of the next stage"""
+    now = time.perf_counter()
+    INGEST_STAGE_SECONDS.observe(now - started, stage)
+    return now
+
 # Models
 class User(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -125,6 +463,7 @@ class User(BaseModel):
     oauth_provider: Optional[str] = None  # 'google', 'email', etc.
     google_id: Optional[str] = None  # Google user ID
     is_super_admin: bool = False
+    plan: str = "free"  # drives raw traffic log retention, see PLAN_RETENTION_DAYS
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class UserCreate(BaseModel):
@@ -135,6 +474,9 @@ class UserLogin(BaseModel):
     email: EmailStr
     password: str
 
+class PlanUpdate(BaseModel):
+    plan: str
+
 class GoogleAuthRequest(BaseModel):
     token: str
     email: str
@@ -163,6 +505,8 @@ class Blog(BaseModel):
     tags: List[str] = Field(default_factory=list)
     view_count: int = 0
     reading_time: int = 0  # in minutes
+    word_count: int = 0
+    outline: List[Dict[str, Any]] = Field(default_factory=list)  # [{level, text}] of the h1-h6 headings
     published_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -171,7 +515,7 @@ class BlogCreate(BaseModel):
     title: str
     slug: Optional[str] = None
     content: str
-    excerpt: str
+    excerpt: str = ""  # defaults to the start of the content
     featured_image: Optional[str] = None
     status: str = "draft"
     seo_title: Optional[str] = None
@@ -209,6 +553,8 @@ class BlogResponse(BaseModel):
     tags: List[str]
     view_count: int
     reading_time: int
+    word_count: int = 0
+    outline: List[Dict[str, Any]] = Field(default_factory=list)
     published_at: Optional[datetime]
     created_at: datetime
     updated_at: datetime
@@ -235,6 +581,11 @@ class Domain(BaseModel):
     verification_token: str = Field(default_factory=lambda: secrets.token_urlsafe(16))
     is_verified: bool = False
     verified_at: Optional[datetime] = None
+    # Written by record_verification_result (button or reverification_loop)
+    last_checked_at: Optional[datetime] = None
+    last_check_errors: List[str] = Field(default_factory=list)
+    check_failures: int = 0  # consecutive failed checks, drives the backoff
+    next_check_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class DomainCreate(BaseModel):
@@ -246,6 +597,9 @@ class DomainResponse(BaseModel):
     is_verified: bool
     verification_token: str
     verified_at: Optional[datetime]
+    last_checked_at: Optional[datetime] = None
+    last_check_errors: List[str] = Field(default_factory=list)
+    next_check_at: Optional[datetime] = None
     created_at: datetime
 
 class TrafficLog(BaseModel):
@@ -330,6 +684,18 @@ class AlertResponse(BaseModel):
     is_active: bool
     created_at: datetime
 
+def projection_for(model) -> dict:
+    """Mongo projection that only fetches the fields a response model exposes"""
+    return {"_id": 0, **{name: 1 for name in model.model_fields}}
+
+TRAFFIC_LOG_PROJECTION = projection_for(TrafficLogResponse)
+DOMAIN_PROJECTION = projection_for(DomainResponse)
+BLOG_LIST_PROJECTION = projection_for(BlogListResponse)
+# Full posts without the derived search fields, which are only read by the text index
+BLOG_DETAIL_PROJECTION = {"_id": 0, "plain_text": 0, "search_tokens": 0, "auto_excerpt": 0, "content_version": 0}
+ADMIN_USER_PROJECTION = {"_id": 0, "id": 1, "email": 1, "is_super_admin": 1, "oauth_provider": 1, "google_id": 1,
+                         "plan": 1, "created_at": 1}
+
 class StatsResponse(BaseModel):
     total_requests: int
     bot_requests: int
@@ -338,6 +704,13 @@ class StatsResponse(BaseModel):
     risk_distribution: Dict[str, int]
     recent_activity: List[TrafficLogResponse]
 
+# Lean response path for list endpoints: rows come straight from Mongo with a projection
+# limited to the response fields (dates are already stored as ISO strings), so there is no
+# per-row model construction and FastAPI skips response_model validation when a Response is returned
+class OrjsonResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
 # Helper Functions
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -345,6 +718,55 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+async def run_password_job(fn, *args):
+    """Run a bcrypt call on the process pool; the semaphore caps queued work during login storms"""
+    global PASSWORD_EXECUTOR
+    async with PASSWORD_SEMAPHORE:
+        loop = asyncio.get_running_loop()
+        executor = PASSWORD_EXECUTOR
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (OOM kill, segfault) and the pool refuses all further work, so replace
+            # it (once, however many calls saw it break) and retry on the new one
+            if PASSWORD_EXECUTOR is executor:
+                logger.warning("Password hashing pool is broken, starting a new one")
+                PASSWORD_EXECUTOR = new_password_executor()
+                executor.shutdown(wait=False)
+            return await loop.run_in_executor(PASSWORD_EXECUTOR, fn, *args)
+
+def as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC and convert aware ones to UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def to_utc_iso(value: datetime) -> str:
+    """Normalize a datetime to the UTC ISO string format timestamps are stored in"""
+    return as_utc(value).isoformat()
+
+def encode_cursor(*values) -> str:
+    """Pack the sort key of the last row of a page into an opaque cursor token"""
+    raw = json.dumps(list(values), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int, nullable: tuple = ()) -> list:
+    """Unpack a cursor token produced by encode_cursor.
+
+    Every value must be a string (or None at the positions in nullable): they go straight into
+    query filters, where a crafted {"$gt": ""} would match every row."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    for position, value in enumerate(values):
+        if not isinstance(value, str) and not (value is None and position in nullable):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION)
@@ -366,9 +788,13 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     
-    user = await db.users.find_one({"id": user_id}, {"_id": 0})
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    # Authenticated dashboard calls come in bursts, so a short-lived cache skips the users query
+    user = USER_CACHE.get(user_id)
+    if user is TTLCache.MISSING:
+        user = await db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0})
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        USER_CACHE.set(user_id, user)
     return user
 
 async def get_super_admin(user: dict = Depends(get_current_user)) -> dict:
@@ -394,6 +820,109 @@ def strip_html(html: str) -> str:
     stripper.feed(html)
     return stripper.get_text()
 
+READING_WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 160
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+# Tags whose boundaries separate words ("<p>a</p><p>b</p>" is two words, not "ab")
+BLOCK_TAGS = HEADING_TAGS | {"p", "div", "br", "li", "ul", "ol", "blockquote", "pre", "tr", "td", "th",
+                             "table", "section", "article", "figure", "figcaption", "hr"}
+SKIPPED_TAGS = {"script", "style"}
+
+class BlogContentParser(HTMLParser):
+    """Collects a post's text and heading outline in one pass over its HTML"""
+    def __init__(self):
+        super().__init__()
+        self.text = []
+        self.outline = []
+        self.heading = None  # (level, text parts) of the heading being read
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skipping += 1
+        elif tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag in HEADING_TAGS:
+            self.heading = (int(tag[1]), [])
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skipping = max(0, self.skipping - 1)
+        elif tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag in HEADING_TAGS and self.heading:
+            level, parts = self.heading
+            text = ' '.join(''.join(parts).split())
+            if text:
+                self.outline.append({"level": level, "text": text})
+            self.heading = None
+
+    def handle_data(self, data):
+        if self.skipping:
+            return
+        self.text.append(data)
+        if self.heading:
+            self.heading[1].append(data)
+
+def excerpt_from_text(text: str, length: int = EXCERPT_LENGTH) -> str:
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(' ', 1)[0] + '...'
+
+# Bumped whenever process_blog_content changes what it derives; warm-up reprocesses older posts
+BLOG_CONTENT_VERSION = 3
+BLOG_BACKFILL_BATCH_SIZE = 100
+# Han, Kana and Hangul. These scripts don't put spaces between words, so MongoDB's text index
+# would see a whole sentence as one term; runs of them are indexed and searched as n-grams.
+CJK_RUN = re.compile(r"[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+")
+
+def cjk_grams(run: str) -> List[str]:
+    """Overlapping character bigrams of a CJK run, or the character itself for a one-character run"""
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+def blog_search_tokens(text: str) -> List[str]:
+    """Distinct casefolded search terms of a post's text.
+
+    CJK runs contribute every character and every bigram, so a search for any substring of
+    them (turned into bigrams by add_blog_text_search) matches. Other single characters are
+    dropped except outside ASCII.
+    """
+    tokens = []
+    for word in re.findall(r"\w+", text.casefold()):
+        start = 0
+        for run in CJK_RUN.finditer(word):
+            tokens.append(word[start:run.start()])
+            tokens.extend(run.group())
+            if len(run.group()) > 1:
+                tokens.extend(cjk_grams(run.group()))
+            start = run.end()
+        tokens.append(word[start:])
+    return list(dict.fromkeys(token for token in tokens if len(token) > 1 or (token and not token.isascii())))
+
+def process_blog_content(content: str) -> dict:
+    """Parse a post's HTML once and derive everything the read and search paths need.
+
+    The result is stored on the blog document, so nothing downstream re-parses the HTML.
+    """
+    parser = BlogContentParser()
+    parser.feed(content)
+    parser.close()
+    words = ''.join(parser.text).split()
+    plain_text = ' '.join(words)
+    # Fed to the blog_search text index instead of the raw HTML
+    search_tokens = blog_search_tokens(plain_text)
+    return {
+        "plain_text": plain_text,
+        "word_count": len(words),
+        "reading_time": max(1, round(len(words) / READING_WORDS_PER_MINUTE)),
+        "auto_excerpt": excerpt_from_text(plain_text),
+        "search_tokens": search_tokens,
+        "content_version": BLOG_CONTENT_VERSION,
+        "outline": parser.outline,
+    }
+
 def generate_slug(title: str) -> str:
     """Generate URL-friendly slug from title"""
     slug = title.lower()
@@ -402,6 +931,15 @@ def generate_slug(title: str) -> str:
     slug = slug.strip('-')
     return slug
 
+def add_blog_text_search(query: dict, projection: dict, search: str) -> tuple:
+    """Turn a blog query into a blog_search index search; returns the projection and sort ranking by relevance"""
+    # CJK runs become the bigrams blog_search_tokens indexed; other terms are passed through as typed
+    search = CJK_RUN.sub(lambda run: " " + " ".join(cjk_grams(run.group())) + " ", search.casefold())
+    query["$text"] = {"$search": search}
+    projection = {**projection, "score": {"$meta": "textScore"}}
+    sort = [("score", {"$meta": "textScore"}), ("published_at", -1)]
+    return projection, sort
+
 # code update by Subhro for bot fingerprint for detecting rotating IP by the identifier created
 
 def generate_fingerprint(user_agent: str, headers: dict, ip: str) -> str:
@@ -416,13 +954,6 @@ def generate_fingerprint(user_agent: str, headers: dict, ip: str) -> str:
     return hashlib.sha256(raw.encode()).hexdigest()
 
 
-def calculate_reading_time(content: str) -> int:
-    """Calculate reading time in minutes (avg 200 words/min)"""
-    text = strip_html(content)
-    word_count = len(text.split())
-    reading_time = max(1, round(word_count / 200))
-    return reading_time
-
 #code updated by subhro (FIX one IP issues BUG)
 
 def get_real_ip(headers: dict, fallback_ip: str) -> str:
@@ -457,21 +988,696 @@ def analyze_behavior(fingerprint: str, path: str) -> str:
 
 #code change by Subhro 
 # Add periodic cleanup
+CLEANUP_YIELD_EVERY = 1000
+
 async def cleanup_request_history():
     while True:
         await asyncio.sleep(3600)  # Every hour
         now = time.time()
-        for key in list(REQUEST_HISTORY.keys()):
-            REQUEST_HISTORY[key] = [h for h in REQUEST_HISTORY[key] if now - h[0] < 3600]
-            if not REQUEST_HISTORY[key]:
-                del REQUEST_HISTORY[key]
-
-def extract_excerpt(content: str, length: int = 160) -> str:
-    """Extract excerpt from content"""
-    text = strip_html(content)
-    if len(text) <= length:
-        return text
-    return text[:length].rsplit(' ', 1)[0] + '...'
+        for i, key in enumerate(list(REQUEST_HISTORY.keys())):
+            if key in REQUEST_HISTORY:
+                REQUEST_HISTORY[key] = [h for h in REQUEST_HISTORY[key] if now - h[0] < 3600]
+                if not REQUEST_HISTORY[key]:
+                    del REQUEST_HISTORY[key]
+            if i % CLEANUP_YIELD_EVERY == CLEANUP_YIELD_EVERY - 1:
+                await asyncio.sleep(0)  # let ingest run between chunks of a large sweep
+
+# Index plan: every index the app relies on, derived from the query shapes in QUERY_SHAPES.
+# Each collection carries exactly these (plus _id_); anything else is redundant write overhead
+# and is dropped by `python verify_indexes.py --drop-redundant`. Time partitions of traffic_logs
+# get the traffic_logs plan.
+INDEX_PLAN = {
+    "users": [
+        {"keys": [("id", 1)], "unique": True},                      # get_current_user, admin lookups
+        {"keys": [("email", 1)], "unique": True},                   # register, login, google auth
+    ],
+    "domains": [
+        {"keys": [("id", 1)], "unique": True},                      # verify, check-dns, delete
+        {"keys": [("user_id", 1), ("domain", 1)]},                  # get_domains, create_domain
+        {"keys": [("domain", 1), ("is_verified", 1)]},              # log_traffic domain lookup
+        {"keys": [("next_check_at", 1)]},                           # reverify_due_domains
+        {"keys": [("created_at", -1), ("id", -1)]},                 # get_all_domains (admin pages)
+    ],
+    "api_keys": [
+        {"keys": [("key", 1)], "unique": True},                     # log_traffic key lookup
+        {"keys": [("user_id", 1), ("key", 1)]},                     # get_api_keys, delete_api_key
+    ],
+    "alerts": [
+        {"keys": [("user_id", 1), ("is_active", 1)]},               # check_and_send_alerts, get_alerts
+    ],
+    "traffic_logs": [
+        # Keyset pagination on (timestamp, id); also serves stats, export, retention and alert counts
+        {"keys": [("user_id", 1), ("timestamp", -1), ("id", -1)]},
+        {"keys": [("user_id", 1), ("domain_id", 1), ("timestamp", -1), ("id", -1)]},
+        {"keys": [("timestamp", 1)]},                               # admin recent activity
+    ],
+    "traffic_rollups": [
+        {"keys": [("user_id", 1), ("domain_id", 1), ("day", 1), ("detected_bot", 1),
+                  ("risk_level", 1), ("behavior_type", 1)], "unique": True},
+    ],
+    "blogs": [
+        {"keys": [("id", 1)], "unique": True},                      # admin get/update/delete
+        {"keys": [("slug", 1)], "unique": True},                    # get_blog_by_slug
+        {"keys": [("status", 1), ("published_at", -1), ("id", -1)]},  # public listings (keyset)
+        # Relevance-ranked search for get_published_blogs / get_all_blogs_admin, over the
+        # tokens process_blog_content extracts (not the raw HTML)
+        {"keys": [("title", "text"), ("excerpt", "text"), ("search_tokens", "text")],
+         "name": "blog_search", "weights": {"title": 10, "excerpt": 5, "search_tokens": 1}},
+    ],
+    "blog_tags": [
+        {"keys": [("name", 1)], "unique": True},                    # adjust_tag_counts
+        {"keys": [("count", -1)]},                                  # get_all_tags
+    ],
+    "bot_policies": [
+        {"keys": [("bot_name", 1)], "unique": True},                # is_bot_blocked
+    ],
+}
+
+# Representative query of each endpoint, used by verify_indexes.py to explain() the plan
+QUERY_SHAPES = [
+    {"endpoint": "get_current_user", "collection": "users", "filter": {"id": "?"}},
+    {"endpoint": "login", "collection": "users", "filter": {"email": "?"}},
+    {"endpoint": "get_domains", "collection": "domains", "filter": {"user_id": "?"}},
+    {"endpoint": "verify_domain", "collection": "domains", "filter": {"id": "?", "user_id": "?"}},
+    {"endpoint": "log_traffic (domain)", "collection": "domains", "filter": {"domain": "?", "is_verified": True}},
+    {"endpoint": "reverify_due_domains", "collection": "domains",
+     "filter": {"next_check_at": {"$lte": "?"}}, "sort": [("next_check_at", 1)], "limit": 100},
+    {"endpoint": "get_all_domains", "collection": "domains", "filter": {},
+     "sort": [("created_at", -1), ("id", -1)], "limit": 100},
+    {"endpoint": "log_traffic (api key)", "collection": "api_keys", "filter": {"key": "?", "is_active": True}},
+    {"endpoint": "get_api_keys", "collection": "api_keys", "filter": {"user_id": "?"}},
+    {"endpoint": "check_and_send_alerts (alerts)", "collection": "alerts", "filter": {"user_id": "?", "is_active": True}},
+    {"endpoint": "check_and_send_alerts (count)", "collection": "traffic_logs", "count": True,
+     "filter": {"user_id": "?", "domain_id": "?", "detected_bot": {"$ne": None}, "timestamp": {"$gte": "?"}}},
+    {"endpoint": "get_traffic_logs", "collection": "traffic_logs", "filter": {"user_id": "?"},
+     "sort": [("timestamp", -1), ("id", -1)], "limit": 101},
+    {"endpoint": "get_traffic_logs (domain, bot)", "collection": "traffic_logs",
+     "filter": {"user_id": "?", "domain_id": "?", "detected_bot": "?"},
+     "sort": [("timestamp", -1), ("id", -1)], "limit": 101},
+    {"endpoint": "get_traffic_stats", "collection": "traffic_logs", "filter": {"user_id": "?", "timestamp": {"$gte": "?"}}},
+    {"endpoint": "export_traffic_logs", "collection": "traffic_logs", "filter": {"user_id": "?", "domain_id": "?"}},
+    {"endpoint": "get_admin_stats (recent)", "collection": "traffic_logs", "filter": {},
+     "sort": [("timestamp", -1)], "limit": 50},
+    {"endpoint": "apply_retention", "collection": "traffic_logs", "filter": {"user_id": "?", "timestamp": {"$lt": "?"}}},
+    {"endpoint": "get_blog_by_slug", "collection": "blogs", "filter": {"slug": "?", "status": "published"}},
+    {"endpoint": "update_blog", "collection": "blogs", "filter": {"id": "?"}},
+    {"endpoint": "get_published_blogs", "collection": "blogs", "filter": {"status": "published"},
+     "sort": [("published_at", -1), ("id", -1)], "limit": 11},
+    {"endpoint": "get_published_blogs (search)", "collection": "blogs",
+     "filter": {"status": "published", "$text": {"$search": "?"}}},
+    {"endpoint": "get_all_tags", "collection": "blog_tags", "filter": {}, "sort": [("count", -1)]},
+    {"endpoint": "is_bot_blocked", "collection": "bot_policies", "filter": {"bot_name": "?"}},
+]
+
+def index_name(spec: dict) -> str:
+    """Name of a planned index: its explicit name, or the default Mongo assigns to the key pattern"""
+    return spec.get("name") or "_".join(f"{field}_{direction}" for field, direction in spec["keys"])
+
+def planned_collections(collection_name: str) -> list:
+    """Collections a plan entry applies to (traffic_logs also covers its time partitions)"""
+    names = [collection_name]
+    if collection_name == "traffic_logs":
+        names += sorted(TRAFFIC_PARTITIONS)
+    return names
+
+async def ensure_planned_indexes(collection, specs: list) -> List[str]:
+    """Create the planned indexes of one collection concurrently, returning any failures"""
+    results = await asyncio.gather(
+        *(collection.create_index(spec["keys"], **{k: v for k, v in spec.items() if k != "keys"}) for spec in specs),
+        return_exceptions=True
+    )
+    errors = []
+    for spec, result in zip(specs, results):
+        if isinstance(result, Exception):
+            errors.append(f"{collection.name}.{index_name(spec)}: {result}")
+            logger.error(f"Index {index_name(spec)} on {collection.name} failed: {result}")
+    return errors
+
+async def apply_index_plan() -> List[str]:
+    results = await asyncio.gather(*(
+        ensure_planned_indexes(db[name], specs)
+        for collection_name, specs in INDEX_PLAN.items()
+        for name in planned_collections(collection_name)
+    ))
+    return [error for errors in results for error in errors]
+
+async def ensure_traffic_log_indexes(collection):
+    await ensure_planned_indexes(collection, INDEX_PLAN["traffic_logs"])
+
+async def redundant_indexes() -> Dict[str, List[str]]:
+    """Existing indexes that are not part of INDEX_PLAN, by collection"""
+    redundant = {}
+    for collection_name, specs in INDEX_PLAN.items():
+        planned = {"_id_"} | {index_name(spec) for spec in specs}
+        for name in planned_collections(collection_name):
+            existing = await db[name].index_information()
+            extra = sorted(set(existing) - planned)
+            if extra:
+                redundant[name] = extra
+    return redundant
+
+def plan_stages(plan: dict) -> List[dict]:
+    """Flatten an explain() plan tree into its stages"""
+    stages = []
+    pending = [plan]
+    while pending:
+        node = pending.pop()
+        if not isinstance(node, dict):
+            continue
+        if "stage" in node:
+            stages.append({"stage": node["stage"], "index": node.get("indexName")})
+        for key in ("inputStage", "queryPlan", "outerStage", "innerStage"):
+            if key in node:
+                pending.append(node[key])
+        pending.extend(node.get("inputStages", []))
+    return stages
+
+async def explain_query_shape(shape: dict) -> dict:
+    if shape.get("count"):
+        command = {"count": shape["collection"], "query": shape["filter"]}
+    else:
+        command = {"find": shape["collection"], "filter": shape["filter"]}
+        if shape.get("sort"):
+            command["sort"] = dict(shape["sort"])
+        if shape.get("limit"):
+            command["limit"] = shape["limit"]
+    result = await db.command({"explain": command, "verbosity": "queryPlanner"})
+    stages = plan_stages(result["queryPlanner"]["winningPlan"])
+    return {
+        "endpoint": shape["endpoint"],
+        "collection": shape["collection"],
+        "stages": [stage["stage"] for stage in stages],
+        "indexes": sorted({stage["index"] for stage in stages if stage["index"]}),
+        "collscan": any(stage["stage"] == "COLLSCAN" for stage in stages),
+        "in_memory_sort": any(stage["stage"] == "SORT" for stage in stages),
+    }
+
+async def unused_indexes() -> Dict[str, List[str]]:
+    """Indexes with no recorded accesses since the server last started ($indexStats)"""
+    unused = {}
+    for collection_name in INDEX_PLAN:
+        for name in planned_collections(collection_name):
+            stats = await db[name].aggregate([{"$indexStats": {}}]).to_list(None)
+            idle = sorted(s["name"] for s in stats if s["name"] != "_id_" and s["accesses"]["ops"] == 0)
+            if idle:
+                unused[name] = idle
+    return unused
+
+# Time partitioning: with TRAFFIC_LOG_PARTITIONING set to "monthly" or "weekly", new events go to
+# traffic_logs_YYYY_MM / traffic_logs_YYYY_wWW and reads fan out only to the partitions that
+# overlap the requested range. The base traffic_logs collection is always read, so data written
+# before partitioning was enabled stays visible. Dropping a month is then a collection drop.
+TRAFFIC_LOG_PARTITIONING = os.environ.get('TRAFFIC_LOG_PARTITIONING', '').lower()
+PARTITION_NAME_RE = re.compile(r"^traffic_logs_(\d{4})_(?:(\d{2})|w(\d{2}))$")
+PARTITION_REFRESH_SECONDS = 60
+
+TRAFFIC_PARTITIONS: Dict[str, tuple] = {}  # collection name -> (start, end) datetimes
+_partitions_loaded_at = 0.0
+
+def partition_name(ts: datetime) -> str:
+    if TRAFFIC_LOG_PARTITIONING == "monthly":
+        return f"traffic_logs_{ts.year}_{ts.month:02d}"
+    if TRAFFIC_LOG_PARTITIONING == "weekly":
+        iso_year, week, _ = ts.isocalendar()
+        return f"traffic_logs_{iso_year}_w{week:02d}"
+    return "traffic_logs"
+
+def partition_bounds(name: str) -> Optional[tuple]:
+    """Time range [start, end) covered by a partition collection, None for other names"""
+    match = PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    year, month, week = match.groups()
+    if month:
+        start = datetime(int(year), int(month), 1, tzinfo=timezone.utc)
+        end = datetime(int(year) + int(month) // 12, int(month) % 12 + 1, 1, tzinfo=timezone.utc)
+    else:
+        start = datetime.fromisocalendar(int(year), int(week), 1).replace(tzinfo=timezone.utc)
+        end = start + timedelta(days=7)
+    return start, end
+
+async def load_traffic_partitions():
+    global _partitions_loaded_at
+    names = await db.list_collection_names(filter={"name": {"$regex": "^traffic_logs_"}})
+    partitions = {}
+    for name in names:
+        bounds = partition_bounds(name)
+        if bounds:
+            partitions[name] = bounds
+    TRAFFIC_PARTITIONS.clear()
+    TRAFFIC_PARTITIONS.update(partitions)
+    _partitions_loaded_at = time.monotonic()
+
+async def traffic_collection_for_write(ts: datetime):
+    name = partition_name(ts)
+    if name != "traffic_logs" and name not in TRAFFIC_PARTITIONS:
+        TRAFFIC_PARTITIONS[name] = partition_bounds(name)
+        await ensure_traffic_log_indexes(db[name])
+        logger.info(f"Created traffic log partition {name}")
+    return db[name]
+
+async def traffic_collections(start: Optional[datetime] = None, end: Optional[datetime] = None) -> list:
+    """Collections that can hold events in [start, end); open ends mean unbounded"""
+    # Other workers may have opened a partition since the last refresh
+    if time.monotonic() - _partitions_loaded_at > PARTITION_REFRESH_SECONDS:
+        await load_traffic_partitions()
+    start = as_utc(start) if start else None
+    end = as_utc(end) if end else None
+
+    def overlaps(bounds):
+        return (end is None or bounds[0] < end) and (start is None or bounds[1] > start)
+
+    names = {name for name, bounds in TRAFFIC_PARTITIONS.items() if overlaps(bounds)}
+    if TRAFFIC_LOG_PARTITIONING:
+        current = partition_name(datetime.now(timezone.utc))
+        if overlaps(partition_bounds(current)):
+            names.add(current)
+    return [db.traffic_logs] + [db[name] for name in sorted(names)]
+
+async def find_traffic_logs(
+    query: dict,
+    projection: dict,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    sort: Optional[list] = None,
+    limit: int = 0
+) -> List[dict]:
+    """Run a find on every overlapping collection concurrently and merge the results"""
+    collections = await traffic_collections(start, end)
+
+    async def fetch(collection):
+        cursor = collection.find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list(limit or None)
+
+    results = await asyncio.gather(*(fetch(c) for c in collections))
+    if len(results) == 1:
+        return results[0]
+    if sort:
+        fields = [field for field, _ in sort]
+        merged = heapq.merge(
+            *results,
+            key=lambda row: tuple(row.get(field) for field in fields),
+            reverse=sort[0][1] == -1
+        )
+    else:
+        merged = itertools.chain(*results)
+    return list(itertools.islice(merged, limit)) if limit else list(merged)
+
+async def count_traffic_logs(query: dict, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+    collections = await traffic_collections(start, end)
+    counts = await asyncio.gather(*(c.count_documents(query) for c in collections))
+    return sum(counts)
+
+# Production runs several uvicorn workers and each one starts every background loop. Jobs that
+# must run once per cluster take a lease in the locks collection first; the lease expires, so a
+# worker that dies mid-job frees it, and the holder renews it while it works.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+async def acquire_lease(name: str, seconds: float) -> bool:
+    """Take or renew the named lease for this worker; False if another worker holds it"""
+    now = datetime.now(timezone.utc)
+    try:
+        await db.locks.update_one(
+            {"_id": name, "$or": [{"owner": WORKER_ID}, {"expires_at": {"$lte": now.isoformat()}}]},
+            {"$set": {"owner": WORKER_ID, "expires_at": (now + timedelta(seconds=seconds)).isoformat()}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False  # the lease exists, is unexpired and belongs to someone else
+    return True
+
+async def release_lease(name: str):
+    try:
+        await db.locks.delete_one({"_id": name, "owner": WORKER_ID})
+    except Exception as e:
+        logger.warning(f"Could not release lease {name}, it will expire: {e}")
+
+# Jobs started from admin endpoints. Holding the task keeps it from being garbage collected
+# mid-run, and the callback logs anything it raised instead of leaving it unretrieved.
+ADMIN_JOBS: set = set()
+
+def start_admin_job(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    ADMIN_JOBS.add(task)
+    task.add_done_callback(finish_admin_job)
+    return task
+
+def finish_admin_job(task: asyncio.Task):
+    ADMIN_JOBS.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error(f"Admin job {task.get_coro().__qualname__} failed: {task.exception()!r}")
+
+# Retention: raw traffic logs older than the owner's plan window are folded into daily
+# rollups (traffic_rollups) and then deleted in small, paced batches so ingest never waits on it
+PLAN_RETENTION_DAYS = {
+    "free": int(os.environ.get('RETENTION_DAYS_FREE', 30)),
+    "pro": int(os.environ.get('RETENTION_DAYS_PRO', 90)),
+    "enterprise": int(os.environ.get('RETENTION_DAYS_ENTERPRISE', 365)),
+}
+RETENTION_INTERVAL = int(os.environ.get('RETENTION_INTERVAL_SECONDS', 6 * 3600))
+RETENTION_BATCH_SIZE = int(os.environ.get('RETENTION_BATCH_SIZE', 1000))
+RETENTION_MAX_DOCS_PER_SECOND = float(os.environ.get('RETENTION_MAX_DOCS_PER_SECOND', 2000))
+RETENTION_LEASE_SECONDS = 300  # renewed after every batch
+ROLLUP_BATCH_MEMORY = 20  # batch ids each rollup remembers, to skip re-applying a retried batch
+
+RETENTION_STATUS = {
+    "running": False,
+    "last_started_at": None,
+    "last_finished_at": None,
+    "current_user_id": None,
+    "users_processed": 0,
+    "rolled_up": 0,
+    "deleted": 0,
+    "partitions_dropped": 0,
+    "last_error": None,
+    "skipped": None,
+}
+
+ROLLUP_FIELDS = {"_id": 0, "id": 1, "user_id": 1, "domain_id": 1, "timestamp": 1,
+                 "detected_bot": 1, "risk_level": 1, "behavior_type": 1}
+
+async def apply_rollup_counts(counts: Counter, batch_id: str):
+    """Add counts keyed by (user_id, domain_id, day, bot, risk, behavior) into traffic_rollups.
+
+    Each rollup remembers the last few batch ids it absorbed, so applying the same batch again
+    (a retry after a failure part-way through) leaves it unchanged: the filter no longer matches
+    and the upsert trips the unique key instead of inserting a second document."""
+    operations = [
+        UpdateOne(
+            {"user_id": user_id, "domain_id": domain_id, "day": day, "detected_bot": bot,
+             "risk_level": risk, "behavior_type": behavior, "batches": {"$ne": batch_id}},
+            {"$inc": {"count": count},
+             "$push": {"batches": {"$each": [batch_id], "$slice": -ROLLUP_BATCH_MEMORY}}},
+            upsert=True
+        )
+        for (user_id, domain_id, day, bot, risk, behavior), count in counts.items()
+    ]
+    if not operations:
+        return
+    try:
+        await db.traffic_rollups.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+            raise
+
+async def roll_up_claimed(collection, batch: dict) -> tuple:
+    """Fold the logs claimed by a retention batch into rollups, then delete them.
+
+    Safe to repeat: the rollup ignores a batch id it already applied and the delete only
+    touches the claimed logs. Returns (rolled up, deleted)."""
+    # The user and timestamp range keep both queries on the (user_id, timestamp) index
+    claimed = {"user_id": batch["user_id"], "timestamp": {"$gte": batch["first"], "$lte": batch["last"]},
+               "retention_claim": batch["_id"]}
+    logs = await collection.find(claimed, ROLLUP_FIELDS).to_list(None)
+    counts = Counter(
+        (log['user_id'], log['domain_id'], log['timestamp'][:10], log.get('detected_bot'),
+         log.get('risk_level', 'unknown'), log.get('behavior_type'))
+        for log in logs
+    )
+    await apply_rollup_counts(counts, batch["_id"])
+    result = await collection.delete_many(claimed)
+    await db.retention_batches.delete_one({"_id": batch["_id"]})
+    return len(logs), result.deleted_count
+
+async def claim_retention_batch(collection, user_id: str, cutoff: datetime) -> Optional[dict]:
+    """Mark the oldest batch of expired logs with a fresh batch id; None when nothing is left"""
+    logs = await collection.find(
+        {"user_id": user_id, "timestamp": {"$lt": cutoff.isoformat()}, "retention_claim": {"$exists": False}},
+        {"_id": 0, "id": 1, "timestamp": 1}
+    ).sort([("timestamp", 1), ("id", 1)]).limit(RETENTION_BATCH_SIZE).to_list(RETENTION_BATCH_SIZE)
+    if not logs:
+        return None
+    batch = {"_id": str(uuid.uuid4()), "collection": collection.name, "user_id": user_id,
+             "first": logs[0]['timestamp'], "last": logs[-1]['timestamp'],
+             "created_at": datetime.now(timezone.utc).isoformat()}
+    # Journal the batch first so a pass that dies after claiming can find and finish it
+    await db.retention_batches.insert_one(batch)
+    await collection.update_many(
+        {"user_id": user_id, "timestamp": {"$gte": batch["first"], "$lte": batch["last"]},
+         "id": {"$in": [log['id'] for log in logs]}, "retention_claim": {"$exists": False}},
+        {"$set": {"retention_claim": batch["_id"]}}
+    )
+    return batch
+
+async def finish_unfinished_batches():
+    """Complete batches a previous pass claimed but did not get to delete"""
+    async for batch in db.retention_batches.find({}):
+        rolled_up, deleted = await roll_up_claimed(db[batch["collection"]], batch)
+        RETENTION_STATUS["rolled_up"] += rolled_up
+        RETENTION_STATUS["deleted"] += deleted
+
+async def roll_up_and_drop_partition(name: str):
+    """Fold a whole partition into rollups with one server-side $group, then drop it.
+
+    A marker in rolled_up_partitions carries the rollup's batch id and records when the
+    rollup is done, so a retry after a failed drop goes straight to the drop and an
+    interrupted rollup is not added twice."""
+    marker = await db.rolled_up_partitions.find_one_and_update(
+        {"_id": name},
+        {"$setOnInsert": {"batch_id": f"partition:{name}:{uuid.uuid4()}", "rolled_up_at": None, "events": 0}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    if not marker["rolled_up_at"]:
+        pipeline = [
+            {"$group": {
+                "_id": {
+                    "user_id": "$user_id",
+                    "domain_id": "$domain_id",
+                    "day": {"$substrBytes": ["$timestamp", 0, 10]},
+                    "detected_bot": "$detected_bot",
+                    "risk_level": {"$ifNull": ["$risk_level", "unknown"]},
+                    "behavior_type": "$behavior_type",
+                },
+                "count": {"$sum": 1}
+            }}
+        ]
+        groups = await db[name].aggregate(pipeline, allowDiskUse=True).to_list(None)
+        counts = Counter({
+            (g['_id']['user_id'], g['_id']['domain_id'], g['_id']['day'], g['_id'].get('detected_bot'),
+             g['_id']['risk_level'], g['_id'].get('behavior_type')): g['count']
+            for g in groups
+        })
+        await apply_rollup_counts(counts, marker["batch_id"])
+        marker["events"] = sum(counts.values())
+        await db.rolled_up_partitions.update_one(
+            {"_id": name},
+            {"$set": {"rolled_up_at": datetime.now(timezone.utc).isoformat(), "events": marker["events"]}}
+        )
+    await db[name].drop()
+    TRAFFIC_PARTITIONS.pop(name, None)
+    # A late event can recreate the partition; it then needs a fresh rollup
+    await db.rolled_up_partitions.delete_one({"_id": name})
+    logger.info(f"Rolled up and dropped traffic log partition {name} ({marker['events']} events)")
+    return marker["events"]
+
+async def drop_expired_partitions() -> int:
+    """Drop partitions that lie entirely outside the longest plan retention window.
+
+    Runs inside apply_retention, so only the holder of the retention lease gets here."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max(PLAN_RETENTION_DAYS.values()))
+    await load_traffic_partitions()
+    expired = [name for name, (_, end) in TRAFFIC_PARTITIONS.items() if end <= cutoff]
+    for name in expired:
+        if not await acquire_lease("retention", RETENTION_LEASE_SECONDS):
+            raise RuntimeError("Lost the retention lease")
+        RETENTION_STATUS["rolled_up"] += await roll_up_and_drop_partition(name)
+        RETENTION_STATUS["partitions_dropped"] += 1
+    return len(expired)
+
+async def apply_retention():
+    """Run one retention pass over every user, in whichever worker holds the retention lease"""
+    if RETENTION_STATUS["running"]:
+        return
+    if not await acquire_lease("retention", RETENTION_LEASE_SECONDS):
+        RETENTION_STATUS["skipped"] = "another worker holds the retention lease"
+        return
+    RETENTION_STATUS.update({
+        "running": True,
+        "last_started_at": datetime.now(timezone.utc).isoformat(),
+        "users_processed": 0,
+        "rolled_up": 0,
+        "deleted": 0,
+        "partitions_dropped": 0,
+        "last_error": None,
+        "skipped": None,
+    })
+    try:
+        await finish_unfinished_batches()
+        await drop_expired_partitions()
+
+        users = await db.users.find({}, {"_id": 0, "id": 1, "plan": 1}).to_list(None)
+        for user in users:
+            days = PLAN_RETENTION_DAYS.get(user.get('plan') or "free", PLAN_RETENTION_DAYS["free"])
+            cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+            RETENTION_STATUS["current_user_id"] = user['id']
+
+            for collection in await traffic_collections(end=cutoff):
+                while True:
+                    started = time.monotonic()
+                    if not await acquire_lease("retention", RETENTION_LEASE_SECONDS):
+                        raise RuntimeError("Lost the retention lease")
+                    batch = await claim_retention_batch(collection, user['id'], cutoff)
+                    if not batch:
+                        break
+
+                    rolled_up, deleted = await roll_up_claimed(collection, batch)
+                    RETENTION_STATUS["rolled_up"] += rolled_up
+                    RETENTION_STATUS["deleted"] += deleted
+
+                    # Pace the job so it stays under the configured delete rate
+                    budget = rolled_up / RETENTION_MAX_DOCS_PER_SECOND
+                    await asyncio.sleep(max(0.0, budget - (time.monotonic() - started)))
+
+            RETENTION_STATUS["users_processed"] += 1
+
+        logger.info(
+            f"Retention pass complete: {RETENTION_STATUS['users_processed']} users, "
+            f"{RETENTION_STATUS['deleted']} raw logs rolled up and deleted, "
+            f"{RETENTION_STATUS['partitions_dropped']} partitions dropped"
+        )
+    except Exception as e:
+        RETENTION_STATUS["last_error"] = str(e)
+        logger.error(f"Retention pass failed: {e}")
+    finally:
+        RETENTION_STATUS["running"] = False
+        RETENTION_STATUS["current_user_id"] = None
+        RETENTION_STATUS["last_finished_at"] = datetime.now(timezone.utc).isoformat()
+        await release_lease("retention")
+
+async def retention_loop():
+    while True:
+        await asyncio.sleep(RETENTION_INTERVAL)
+        await apply_retention()
+
+# Super-admin dashboard numbers come from a snapshot refreshed in the background instead of
+# full-collection counts per page view. Traffic totals are maintained incrementally: log_traffic
+# bumps in-memory deltas and each refresh flushes them into the counters collection with $inc,
+# so they are lifetime totals that survive retention.
+ADMIN_STATS_REFRESH_SECONDS = int(os.environ.get('ADMIN_STATS_REFRESH_SECONDS', 60))
+# Keyed by (minute the logs were stamped in, counter), so a flush can leave out the minutes
+# the seed already counted
+TRAFFIC_COUNTER_DELTAS = Counter()
+ADMIN_STATS_SNAPSHOT: Dict[str, Any] = {}
+# Counting the logs that existed before the counters scans the whole collection, so it runs
+# once per deployment, in the background worker that holds this lease
+TRAFFIC_COUNTERS_SEED_LEASE_SECONDS = 3600
+_traffic_counters_seeded = False
+
+def traffic_counter_minute(timestamp: datetime) -> str:
+    return timestamp.astimezone(timezone.utc).replace(second=0, microsecond=0).isoformat()
+
+def count_traffic_delta(timestamp: datetime, counter: str):
+    TRAFFIC_COUNTER_DELTAS[(traffic_counter_minute(timestamp), counter)] += 1
+
+async def seed_traffic_counters():
+    """Add the logs stored before the counters existed, once.
+
+    Flushes may create the counters document first (marked seeded: False) and record in
+    counting_since the earliest minute they counted. The seed counts only logs stamped before
+    that minute (or before the current one if nothing was flushed yet) and stores it as
+    seeded_before, which later flushes use to drop the minutes it covered. A document without
+    the seeded field predates this marker and was seeded when created."""
+    global _traffic_counters_seeded
+    if _traffic_counters_seeded:
+        return
+    counters = await db.counters.find_one({"_id": "traffic_totals"}, {"seeded": 1, "counting_since": 1})
+    if counters is not None and counters.get("seeded", True):
+        _traffic_counters_seeded = True
+        return
+    if not await acquire_lease("traffic-counters-seed", TRAFFIC_COUNTERS_SEED_LEASE_SECONDS):
+        return
+    try:
+        counting_since = (counters or {}).get("counting_since")
+        cutoff = counting_since or traffic_counter_minute(datetime.now(timezone.utc))
+        total_logs, bot_detections = await asyncio.gather(
+            count_traffic_logs({"timestamp": {"$lt": cutoff}}),
+            count_traffic_logs({"timestamp": {"$lt": cutoff}, "detected_bot": {"$ne": None}}),
+        )
+        try:
+            # Matching on counting_since too: a flush of older minutes while we counted moved it,
+            # and this pass would count those minutes twice
+            await db.counters.update_one(
+                {"_id": "traffic_totals", "seeded": False, "counting_since": counting_since or {"$exists": False}},
+                {"$inc": {"total_logs": total_logs, "bot_detections": bot_detections},
+                 "$set": {"seeded": True, "seeded_before": cutoff}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return  # seeded by another worker, or counting_since moved; the next refresh checks again
+        _traffic_counters_seeded = True
+        logger.info(f"Seeded traffic counters with {total_logs} logs stored before {cutoff}")
+    finally:
+        await release_lease("traffic-counters-seed")
+
+async def flush_traffic_counters():
+    deltas = {key: value for key, value in TRAFFIC_COUNTER_DELTAS.items() if value}
+    if not deltas:
+        return
+    TRAFFIC_COUNTER_DELTAS.subtract(deltas)
+    try:
+        counters = await db.counters.find_one({"_id": "traffic_totals"}, {"seeded_before": 1})
+        seeded_before = (counters or {}).get("seeded_before")
+        totals = Counter()
+        for (minute, counter), value in deltas.items():
+            if seeded_before is None or minute >= seeded_before:
+                totals[counter] += value
+        update = {"$min": {"counting_since": min(minute for minute, _ in deltas)},
+                  "$setOnInsert": {"seeded": False}}
+        if totals:
+            update["$inc"] = dict(totals)
+        # Matching on seeded_before makes a seed that lands between the read and this write fail
+        # the upsert with a duplicate key
+        await db.counters.update_one({"_id": "traffic_totals", "seeded_before": seeded_before or {"$exists": False}},
+                                     update, upsert=True)
+    except asyncio.CancelledError:
+        # Shutdown cancelled the loop mid-write; keep the deltas for the final flush
+        TRAFFIC_COUNTER_DELTAS.update(deltas)
+        raise
+    except DuplicateKeyError:
+        # The next flush retries the deltas against the seed's cutoff
+        TRAFFIC_COUNTER_DELTAS.update(deltas)
+    except Exception as e:
+        # Put the deltas back so the next flush retries them
+        TRAFFIC_COUNTER_DELTAS.update(deltas)
+        logger.error(f"Traffic counter flush failed: {e}")
+
+async def refresh_admin_stats():
+    await flush_traffic_counters()
+    collections = await traffic_collections()
+    total_users, total_domains, verified_domains, totals, *stored = await asyncio.gather(
+        db.users.estimated_document_count(),
+        db.domains.estimated_document_count(),
+        db.domains.count_documents({"is_verified": True}),
+        db.counters.find_one({"_id": "traffic_totals"}),
+        *(c.estimated_document_count() for c in collections),
+    )
+    totals = totals or {}
+    ADMIN_STATS_SNAPSHOT.update({
+        "total_users": total_users,
+        "total_domains": total_domains,
+        "verified_domains": verified_domains,
+        "total_logs": totals.get("total_logs", 0),
+        "bot_detections": totals.get("bot_detections", 0),
+        "stored_logs": sum(stored),
+        "refreshed_at": datetime.now(timezone.utc).isoformat(),
+    })
+
+async def admin_stats_loop():
+    while True:
+        try:
+            await seed_traffic_counters()
+        except Exception as e:
+            logger.error(f"Traffic counter seed failed: {e}")
+        try:
+            await refresh_admin_stats()
+        except Exception as e:
+            logger.error(f"Admin stats refresh failed: {e}")
+        await asyncio.sleep(ADMIN_STATS_REFRESH_SECONDS)
 
 # code update by Subhro because (bot detection should identify who the client claims to be, 
 # while behavior analysis determines what they are doing)
@@ -481,6 +1687,9 @@ BOT_SIGNATURES = {
     "ChatGPT-User": ["chatgpt-user"],
     "OpenAI-SearchBot": ["openai-search"],
     "ClaudeBot": ["claudebot"],
+    "anthropic-ai": ["anthropic-ai"],
+    "cohere-ai": ["cohere-ai"],
+    "Bytespider": ["bytespider"],
     "Google-Extended": ["google-extended"],
     "GoogleOther": ["googleother"],
     "Google-CloudVertexBot": ["cloudvertex"],
@@ -533,12 +1742,73 @@ def detect_bot(user_agent: str, ip_address: str):
 
 # code change by Subhro (ADMIN RADIO BUTTON to block bots)
 
+async def get_verified_domain(name: str) -> Optional[dict]:
+    domain = DOMAIN_CACHE.get(name)
+    if domain is TTLCache.MISSING:
+        domain = await db.domains.find_one({"domain": name, "is_verified": True}, {"_id": 0})
+        DOMAIN_CACHE.set(name, domain)
+    return domain
+
+async def get_active_api_key(key: str) -> Optional[dict]:
+    api_key_doc = API_KEY_CACHE.get(key)
+    if api_key_doc is TTLCache.MISSING:
+        api_key_doc = await db.api_keys.find_one({"key": key, "is_active": True}, {"_id": 0})
+        API_KEY_CACHE.set(key, api_key_doc)
+    return api_key_doc
+
+async def load_bot_policies():
+    global _bot_policies_loaded_at
+    policies = await db.bot_policies.find({}, {"_id": 0}).to_list(None)
+    BOT_POLICIES.clear()
+    BOT_POLICIES.update({p['bot_name']: p for p in policies})
+    _bot_policies_loaded_at = time.monotonic()
+
 async def is_bot_blocked(bot_name: str):
     if not bot_name:
         return False
-    policy = await db.bot_policies.find_one({"bot_name": bot_name})
+    if time.monotonic() - _bot_policies_loaded_at > CACHE_TTL:
+        await load_bot_policies()
+    policy = BOT_POLICIES.get(bot_name)
     return policy and policy.get("action") == "block"
 
+async def warm_caches():
+    """Preload verified domains, active API keys and bot policies so first requests are warm"""
+    domains, api_keys, _ = await asyncio.gather(
+        db.domains.find({"is_verified": True}, {"_id": 0}).to_list(CACHE_WARM_LIMIT),
+        db.api_keys.find({"is_active": True}, {"_id": 0}).to_list(CACHE_WARM_LIMIT),
+        load_bot_policies(),
+    )
+    for domain in domains:
+        DOMAIN_CACHE.set(domain['domain'], domain)
+    for api_key_doc in api_keys:
+        API_KEY_CACHE.set(api_key_doc['key'], api_key_doc)
+    logger.info(f"Caches warmed: {len(domains)} domains, {len(api_keys)} API keys, {len(BOT_POLICIES)} bot policies")
+
+async def warm_up():
+    """Startup work that should not delay accepting traffic"""
+    async def build_indexes():
+        STARTUP_STATUS["indexes"] = "building"
+        try:
+            await load_traffic_partitions()
+            await backfill_blog_content()
+            errors = await apply_index_plan()
+        except Exception as e:
+            errors = [str(e)]
+        STARTUP_STATUS["index_errors"] = errors
+        STARTUP_STATUS["indexes"] = "failed" if errors else "ready"
+        logger.info("Database indexes created" if not errors else f"Index build finished with {len(errors)} errors")
+
+    async def fill_caches():
+        STARTUP_STATUS["caches"] = "warming"
+        try:
+            await warm_caches()
+            STARTUP_STATUS["caches"] = "warm"
+        except Exception as e:
+            # Lookups still work, they just start cold
+            logger.error(f"Cache warm-up failed: {e}")
+            STARTUP_STATUS["caches"] = "cold"
+
+    await asyncio.gather(build_indexes(), fill_caches(), ensure_tag_counts())
 
 def get_geo_location(ip: str) -> Optional[Dict[str, Any]]:
     """Get geolocation data for IP address using free API"""
@@ -559,6 +1829,303 @@ def get_geo_location(ip: str) -> Optional[Dict[str, Any]]:
         logging.error(f"Geo lookup failed: {e}")
     return None
 
+# Health probes: liveness only says the process is serving; readiness checks Mongo and
+# reports background index builds and cache warm-up
+@api_router.get("/health/live")
+async def liveness():
+    return {"status": "ok"}
+
+@api_router.get("/health/ready")
+async def readiness():
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), timeout=2)
+        mongo = "ok"
+    except Exception as e:
+        mongo = f"error: {e}"
+
+    ready = mongo == "ok" and STARTUP_STATUS["caches"] in ("warm", "cold")
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "mongo": mongo,
+        **STARTUP_STATUS,
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+# Scrape-time gauges for /api/metrics
+# Scrapers send "Authorization: Bearer <token>"; without a token configured the endpoint is off
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+GEO_LOOKUPS_IN_FLIGHT = 0  # submitted to GEO_EXECUTOR and not finished (queued or running)
+
+def metric_caches() -> Dict[str, TTLCache]:
+    return {
+        "user": USER_CACHE,
+        "domain": DOMAIN_CACHE,
+        "api_key": API_KEY_CACHE,
+        "dns_check": DNS_CHECK_CACHE,
+        "file_check": FILE_CHECK_CACHE,
+        "blog_response": BLOG_RESPONSE_CACHE,
+        "blog_count": BLOG_COUNT_CACHE,
+    }
+
+MetricGauge("aibot_request_history_fingerprints", "Fingerprints tracked by analyze_behavior",
+            lambda: len(REQUEST_HISTORY))
+MetricGauge("aibot_request_history_entries", "Request timestamps held across all fingerprints",
+            lambda: sum(len(timestamps) for timestamps in list(REQUEST_HISTORY.values())))
+MetricGauge("aibot_geo_lookups_in_flight", "Geo lookups queued or running on GEO_EXECUTOR",
+            lambda: GEO_LOOKUPS_IN_FLIGHT)
+MetricGauge("aibot_cache_entries", "Entries held per in-process cache",
+            lambda: {(name,): len(cache.entries) for name, cache in metric_caches().items()}, ("cache",))
+MetricGauge("aibot_cache_hits_total", "Cache lookups served from memory",
+            lambda: {(name,): cache.hits for name, cache in metric_caches().items()}, ("cache",), "counter")
+MetricGauge("aibot_cache_misses_total", "Cache lookups that missed (expired or absent)",
+            lambda: {(name,): cache.misses for name, cache in metric_caches().items()}, ("cache",), "counter")
+MetricGauge("aibot_blog_view_buffer_slugs", "Blog views waiting for flush_blog_views",
+            lambda: len(BLOG_VIEW_BUFFER))
+
+@api_router.get("/metrics")
+async def metrics(authorization: Optional[str] = Header(None)):
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return Response("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+# Event loop stall detection. loop_heartbeat wakes up every LOOP_HEARTBEAT_INTERVAL and
+# records how late it woke (the loop lag). LoopWatchdog, a separate thread, notices when the
+# heartbeat stops advancing for longer than LOOP_STALL_THRESHOLD and logs the loop thread's
+# stack at that moment, which is the callback holding the loop.
+LOOP_HEARTBEAT_INTERVAL = float(os.environ.get('LOOP_HEARTBEAT_INTERVAL_MS', 50)) / 1000
+LOOP_STALL_THRESHOLD = float(os.environ.get('LOOP_STALL_THRESHOLD_MS', 200)) / 1000
+LOOP_LAG_SECONDS = MetricHistogram(
+    "aibot_event_loop_lag_seconds", "How late the event loop heartbeat woke up",
+    (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+LOOP_STALLS_TOTAL = MetricCounter("aibot_event_loop_stalls_total", "Event loop stalls longer than LOOP_STALL_THRESHOLD")
+LOOP_STALLS = deque(maxlen=50)  # recent stalls with the blocking stack, newest last
+
+class LoopWatchdog:
+    def __init__(self):
+        self.last_beat = time.monotonic()
+        self.loop_thread_id = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def beat(self):
+        self.last_beat = time.monotonic()
+
+    def start(self):
+        self.loop_thread_id = threading.get_ident()
+        self.beat()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        reported_beat = None
+        while not self._stop.wait(LOOP_STALL_THRESHOLD / 4):
+            beat = self.last_beat
+            blocked_for = time.monotonic() - beat
+            if blocked_for < LOOP_STALL_THRESHOLD or beat == reported_beat:
+                continue
+            # Report each stall once, with the stack the loop is stuck in right now
+            reported_beat = beat
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            LOOP_STALLS_TOTAL.inc()
+            LOOP_STALLS.append({
+                "at": datetime.now(timezone.utc).isoformat(),
+                "blocked_ms": round(blocked_for * 1000, 1),  # when detected; total_ms once it ends
+                "stack": stack,
+            })
+            logger.warning(f"Event loop blocked for {blocked_for * 1000:.0f}ms, loop thread stack:\n{stack}")
+
+LOOP_WATCHDOG = LoopWatchdog()
+
+async def loop_heartbeat():
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(LOOP_HEARTBEAT_INTERVAL)
+        LOOP_WATCHDOG.beat()
+        lag = max(0.0, LOOP_WATCHDOG.last_beat - started - LOOP_HEARTBEAT_INTERVAL)
+        LOOP_LAG_SECONDS.observe(lag)
+        if lag >= LOOP_STALL_THRESHOLD and LOOP_STALLS:
+            # The watchdog reported this stall while it was still going; record how long it lasted
+            LOOP_STALLS[-1].setdefault("total_ms", round(lag * 1000, 1))
+
+@api_router.get("/admin/loop-stalls")
+async def get_loop_stalls(admin: dict = Depends(get_super_admin)):
+    return {
+        "threshold_ms": LOOP_STALL_THRESHOLD * 1000,
+        "total": sum(LOOP_STALLS_TOTAL.values.values()),
+        "recent": list(reversed(LOOP_STALLS)),
+    }
+
+@api_router.get("/admin/mongo-stats")
+async def get_mongo_stats(limit: int = 20, admin: dict = Depends(get_super_admin)):
+    """Query shapes ranked by total time, call count and recent slow executions"""
+    return {"enabled": MONGO_COMMAND_MONITORING, **MONGO_MONITOR.report(max(1, min(limit, 200)))}
+
+@api_router.post("/admin/mongo-stats/reset")
+async def reset_mongo_stats(admin: dict = Depends(get_super_admin)):
+    MONGO_MONITOR.reset()
+    return {"success": True}
+
+# Sampling profiler. A thread snapshots the interpreter stacks (sys._current_frames) every
+# interval and counts identical stacks, which is cheap enough to run against live traffic.
+# Results use the collapsed format ("frame;frame;frame count") read by flamegraph.pl and speedscope.
+PROFILE_MAX_SECONDS = int(os.environ.get('PROFILE_MAX_SECONDS', 60))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+# Requests are profiled when they send "X-Profile: <PROFILE_REQUEST_SECRET>" or are picked
+# at PROFILE_REQUEST_SAMPLE_RATE; both off by default
+PROFILE_REQUEST_SECRET = os.environ.get('PROFILE_REQUEST_SECRET')
+PROFILE_REQUEST_SAMPLE_RATE = float(os.environ.get('PROFILE_REQUEST_SAMPLE_RATE', 0))
+REQUEST_PROFILES = deque(maxlen=int(os.environ.get('PROFILE_RING_SIZE', 50)))  # newest last
+_profile_lock = asyncio.Lock()
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler:
+    """Counts the stacks of the given threads (all but its own when None) until stopped"""
+    def __init__(self, interval: float, thread_ids: Optional[set] = None):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while True:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame))
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            if self._stop.wait(self.interval):
+                break
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+def collapsed_stacks(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+class RequestProfilerMiddleware:
+    """Profiles the event loop thread while selected requests run, keeping results in REQUEST_PROFILES.
+
+    Coroutines of other requests interleave on the same thread, so a profile shows everything the
+    loop did during the request, which is also what made it slow.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    def wants_profile(self, scope) -> bool:
+        if PROFILE_REQUEST_SAMPLE_RATE and random.random() < PROFILE_REQUEST_SAMPLE_RATE:
+            return True
+        if not PROFILE_REQUEST_SECRET:
+            return False
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return secrets.compare_digest(value, PROFILE_REQUEST_SECRET.encode())
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        status_code = None
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        sampler = StackSampler(PROFILE_INTERVAL_MS / 1000, {threading.get_ident()}).start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            duration = time.perf_counter() - started
+            stacks = await asyncio.to_thread(sampler.stop)
+            REQUEST_PROFILES.append({
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round(duration * 1000, 2),
+                "samples": sampler.samples,
+                "at": datetime.now(timezone.utc).isoformat(),
+                "collapsed": collapsed_stacks(stacks),
+            })
+
+app.add_middleware(RequestProfilerMiddleware)
+
+@api_router.get("/admin/profile")
+async def profile_process(
+    seconds: float = 10,
+    interval_ms: float = PROFILE_INTERVAL_MS,
+    format: str = "collapsed",
+    admin: dict = Depends(get_super_admin)
+):
+    """Sample every thread of this worker for `seconds`; collapsed text or JSON (format=json)"""
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {PROFILE_MAX_SECONDS}")
+    if interval_ms < 1:
+        raise HTTPException(status_code=400, detail="interval_ms must be at least 1")
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    async with _profile_lock:
+        sampler = StackSampler(interval_ms / 1000).start()
+        await asyncio.sleep(seconds)
+        stacks = await asyncio.to_thread(sampler.stop)
+
+    if format == "json":
+        return {
+            "seconds": seconds,
+            "interval_ms": interval_ms,
+            "samples": sampler.samples,
+            "stacks": [{"stack": stack, "count": count} for stack, count in stacks.most_common()],
+        }
+    return Response(collapsed_stacks(stacks), media_type="text/plain")
+
+@api_router.get("/admin/profiles")
+async def list_request_profiles(admin: dict = Depends(get_super_admin)):
+    return [{k: v for k, v in profile.items() if k != "collapsed"} for profile in reversed(REQUEST_PROFILES)]
+
+@api_router.get("/admin/profiles/{profile_id}")
+async def get_request_profile(profile_id: str, admin: dict = Depends(get_super_admin)):
+    for profile in REQUEST_PROFILES:
+        if profile["id"] == profile_id:
+            return Response(profile["collapsed"], media_type="text/plain")
+    raise HTTPException(status_code=404, detail="Profile not found")
+
 # Auth Routes
 @api_router.post("/auth/register", response_model=UserResponse)
 async def register(user_data: UserCreate):
@@ -590,7 +2157,7 @@ async def register(user_data: UserCreate):
     
     user = User(
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=await run_password_job(hash_password, user_data.password),
         oauth_provider="email"
     )
     
@@ -610,7 +2177,7 @@ async def login(credentials: UserLogin):
     if user.get('oauth_provider') == 'google' and not user.get('password_hash'):
         raise HTTPException(status_code=401, detail="Please sign in with Google")
     
-    if not verify_password(credentials.password, user.get('password_hash', '')):
+    if not await run_password_job(verify_password, credentials.password, user.get('password_hash', '')):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     token = create_access_token({"sub": user['id'], "email": user['email']})
@@ -635,6 +2202,7 @@ async def google_auth(auth_data: GoogleAuthRequest):
                 )
                 user['google_id'] = google_user_id
                 user['oauth_provider'] = "google"
+                USER_CACHE.invalidate(user['id'])
         else:
             # Create new user
             user = User(
@@ -678,21 +2246,290 @@ async def create_domain(domain_data: DomainCreate, user: dict = Depends(get_curr
         domain=domain_data.domain
     )
     
+    domain.next_check_at = datetime.now(timezone.utc) + timedelta(seconds=REVERIFY_BACKOFF_BASE)
     doc = domain.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
+    doc['next_check_at'] = doc['next_check_at'].isoformat()
     await db.domains.insert_one(doc)
     
     return DomainResponse(**domain.model_dump())
 
 @api_router.get("/domains", response_model=List[DomainResponse])
 async def get_domains(user: dict = Depends(get_current_user)):
-    domains = await db.domains.find({"user_id": user['id']}, {"_id": 0}).to_list(1000)
-    for d in domains:
-        if isinstance(d.get('created_at'), str):
-            d['created_at'] = datetime.fromisoformat(d['created_at'])
-        if d.get('verified_at') and isinstance(d['verified_at'], str):
-            d['verified_at'] = datetime.fromisoformat(d['verified_at'])
-    return [DomainResponse(**d) for d in domains]
+    domains = await db.domains.find({"user_id": user['id']}, DOMAIN_PROJECTION).to_list(1000)
+    return OrjsonResponse(domains)
+
+# Domain ownership checks. Both run on the event loop (async resolver, async HTTP client),
+# so a slow nameserver or site only delays its own request, never ingest.
+try:
+    import dns.asyncresolver
+    import dns.resolver
+    DNS_AVAILABLE = True
+except ImportError:
+    DNS_AVAILABLE = False
+
+# Comma separated nameservers to query instead of the system ones (e.g. a local stub DNS)
+VERIFY_DNS_NAMESERVERS = [ns.strip() for ns in os.environ.get('VERIFY_DNS_NAMESERVERS', '').split(',') if ns.strip()]
+VERIFY_DNS_PORT = int(os.environ.get('VERIFY_DNS_PORT', 53))
+VERIFY_DNS_TIMEOUT = float(os.environ.get('VERIFY_DNS_TIMEOUT_SECONDS', 5))
+VERIFY_HTTP_TIMEOUT = float(os.environ.get('VERIFY_HTTP_TIMEOUT_SECONDS', 5))
+VERIFY_HTTP_MAX_REDIRECTS = 5  # http->https, apex->www and trailing-slash hops
+# Where the verification file is fetched from; {domain} is substituted
+VERIFY_FILE_URL = os.environ.get('VERIFY_FILE_URL', 'https://{domain}/.well-known/aibot-detect.txt')
+# Results (including failures) are reused briefly so repeated clicks don't re-query
+VERIFY_CACHE_TTL = float(os.environ.get('VERIFY_CACHE_TTL_SECONDS', 15))
+DNS_CHECK_CACHE = TTLCache(VERIFY_CACHE_TTL)   # domain -> lookup_txt_records result
+FILE_CHECK_CACHE = TTLCache(VERIFY_CACHE_TTL)  # domain -> fetch_verification_file result
+VERIFY_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+_dns_resolver = None
+_checks_in_flight: Dict[tuple, asyncio.Task] = {}  # concurrent checks of a domain share one query
+
+def verification_record(domain: dict) -> str:
+    return f"aibot-detect={domain['verification_token']}"
+
+def verification_file_url(domain_name: str) -> str:
+    return VERIFY_FILE_URL.format(domain=domain_name)
+
+def get_dns_resolver():
+    global _dns_resolver
+    if _dns_resolver is None:
+        resolver = dns.asyncresolver.Resolver(configure=not VERIFY_DNS_NAMESERVERS)
+        if VERIFY_DNS_NAMESERVERS:
+            resolver.nameservers = VERIFY_DNS_NAMESERVERS
+        resolver.port = VERIFY_DNS_PORT
+        resolver.lifetime = VERIFY_DNS_TIMEOUT
+        resolver.cache = None  # DNS_CHECK_CACHE decides how long answers are reused
+        _dns_resolver = resolver
+    return _dns_resolver
+
+def get_verify_http_client() -> httpx.AsyncClient:
+    # Creating the client loads the CA bundle (~100ms of blocking work), so lifespan
+    # does it once at startup rather than on the first verification
+    global VERIFY_HTTP_CLIENT
+    if VERIFY_HTTP_CLIENT is None:
+        VERIFY_HTTP_CLIENT = httpx.AsyncClient(
+            timeout=VERIFY_HTTP_TIMEOUT, verify=True,
+            follow_redirects=True, max_redirects=VERIFY_HTTP_MAX_REDIRECTS
+        )
+    return VERIFY_HTTP_CLIENT
+
+async def cached_check(cache: TTLCache, kind: str, domain_name: str, run) -> dict:
+    """Result of run(domain_name) from cache, joining an identical check already in flight"""
+    cached = cache.get(domain_name)
+    if cached is not TTLCache.MISSING:
+        return cached
+    key = (kind, domain_name)
+    task = _checks_in_flight.get(key)
+    if task is None:
+        task = asyncio.create_task(run(domain_name))
+        _checks_in_flight[key] = task
+        task.add_done_callback(lambda _: _checks_in_flight.pop(key, None))
+    result = await asyncio.shield(task)
+    cache.set(domain_name, result)
+    return result
+
+async def lookup_txt_records(domain_name: str) -> dict:
+    """TXT records of a domain as {"records", "status", "error"}; status is one of
+    records_found, no_records, no_txt_records, domain_not_found, timeout, unavailable or error"""
+    return await cached_check(DNS_CHECK_CACHE, "dns", domain_name, query_txt_records)
+
+async def fetch_verification_file(domain_name: str) -> dict:
+    """The domain's verification file as {"status_code", "body", "error"}"""
+    return await cached_check(FILE_CHECK_CACHE, "file", domain_name, request_verification_file)
+
+async def query_txt_records(domain_name: str) -> dict:
+    result = {"records": [], "status": "error", "error": None}
+    if not DNS_AVAILABLE:
+        result.update(status="unavailable", error="DNS verification not available (dnspython not installed)")
+        return result
+    try:
+        answers = await get_dns_resolver().resolve(domain_name, 'TXT')
+        for rdata in answers:
+            for txt_string in rdata.strings:
+                result["records"].append(txt_string.decode('utf-8') if isinstance(txt_string, bytes) else txt_string)
+        result["status"] = "records_found" if result["records"] else "no_records"
+    except dns.resolver.NXDOMAIN:
+        result.update(status="domain_not_found", error=f"Domain {domain_name} does not exist")
+    except dns.resolver.NoAnswer:
+        result.update(status="no_txt_records", error="No TXT records found for domain")
+    except dns.resolver.Timeout:
+        result.update(status="timeout", error="DNS query timed out. Please try again.")
+    except Exception as e:
+        result["error"] = f"DNS lookup error: {str(e)}"
+    return result
+
+async def request_verification_file(domain_name: str) -> dict:
+    result = {"status_code": None, "body": "", "error": None}
+    try:
+        response = await get_verify_http_client().get(verification_file_url(domain_name))
+        result.update(status_code=response.status_code, body=response.text)
+    except httpx.TimeoutException:
+        result["error"] = "File verification timed out"
+    except httpx.TooManyRedirects:
+        result["error"] = f"Too many redirects fetching the verification file (more than {VERIFY_HTTP_MAX_REDIRECTS})"
+    except httpx.ConnectError as e:
+        if isinstance(e.__context__, ssl.SSLError) or "CERTIFICATE" in str(e).upper():
+            result["error"] = "SSL certificate error. Ensure your domain has a valid SSL certificate."
+        else:
+            result["error"] = f"Cannot connect to {domain_name}. Ensure the domain is accessible."
+    except Exception as e:
+        logging.error(f"File verification error: {e}")
+        result["error"] = f"File verification failed: {str(e)}"
+    return result
+
+async def check_domain_ownership(domain: dict) -> tuple:
+    """Run the DNS TXT and file checks concurrently.
+
+    Returns (method, errors): method is "DNS" or "FILE" when either check passes, else None.
+    """
+    expected = verification_record(domain)
+    dns_result, file_result = await asyncio.gather(
+        lookup_txt_records(domain['domain']),
+        fetch_verification_file(domain['domain']),
+    )
+    if any(expected in record for record in dns_result["records"]):
+        return "DNS", []
+    if file_result["status_code"] == 200 and domain['verification_token'] in file_result["body"]:
+        return "FILE", []
+
+    errors = []
+    if dns_result["records"]:
+        errors.append(f"DNS TXT records found but don't match. Found: {', '.join(dns_result['records'][:3])}")
+    elif dns_result["status"] == "no_records":
+        errors.append("No TXT records found for domain")
+    else:
+        errors.append(dns_result["error"])
+
+    if file_result["error"]:
+        errors.append(file_result["error"])
+    elif file_result["status_code"] == 200:
+        errors.append(f"File found but token doesn't match. Expected: {domain['verification_token']}")
+    else:
+        errors.append(f"File not found (HTTP {file_result['status_code']})")
+    return None, errors
+
+# Background re-verification. Pending domains are retried with exponential backoff per domain
+# (check_failures), verified ones are re-validated every REVALIDATE_VERIFIED_INTERVAL and lose
+# verification after REVALIDATE_MAX_FAILURES consecutive failed checks. Every result is stored
+# on the domain so the dashboard reads it instead of running live lookups.
+REVERIFY_INTERVAL = int(os.environ.get('REVERIFY_INTERVAL_SECONDS', 300))
+REVERIFY_BATCH_SIZE = int(os.environ.get('REVERIFY_BATCH_SIZE', 100))
+REVERIFY_CONCURRENCY = int(os.environ.get('REVERIFY_CONCURRENCY', 10))
+REVERIFY_BACKOFF_BASE = int(os.environ.get('REVERIFY_BACKOFF_BASE_SECONDS', 300))
+REVERIFY_BACKOFF_MAX = int(os.environ.get('REVERIFY_BACKOFF_MAX_SECONDS', 24 * 3600))
+REVALIDATE_VERIFIED_INTERVAL = int(os.environ.get('REVALIDATE_VERIFIED_SECONDS', 24 * 3600))
+REVALIDATE_MAX_FAILURES = int(os.environ.get('REVALIDATE_MAX_FAILURES', 3))
+# Every worker runs the loop, so each domain is claimed by pushing its next_check_at this far
+# ahead before it is checked; the result then sets the real next check
+REVERIFY_CLAIM_SECONDS = 600
+REVERIFY_STATUS = {
+    "running": False,
+    "last_started_at": None,
+    "last_finished_at": None,
+    "checked": 0,
+    "verified": 0,
+    "failed": 0,
+    "unverified": 0,
+}
+
+def next_check_delay(domain_verified: bool, failures: int) -> int:
+    if domain_verified and not failures:
+        return REVALIDATE_VERIFIED_INTERVAL
+    return min(REVERIFY_BACKOFF_MAX, REVERIFY_BACKOFF_BASE * 2 ** max(0, failures - 1))
+
+async def record_verification_result(domain: dict, method: Optional[str], errors: List[str]) -> dict:
+    """Store the outcome of a check on the domain and schedule the next one; returns the changes"""
+    now = datetime.now(timezone.utc)
+    update = {"last_checked_at": now.isoformat(), "last_check_errors": errors}
+    if method:
+        was_verified = domain.get('is_verified', False)
+        update["check_failures"] = 0
+        if not was_verified:
+            update.update(is_verified=True, verified_at=now.isoformat())
+    else:
+        # $inc and read back, so a concurrent check of the same domain is counted too
+        current = await db.domains.find_one_and_update(
+            {"id": domain['id']},
+            {"$set": update, "$inc": {"check_failures": 1}},
+            projection={"_id": 0, "is_verified": 1, "check_failures": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if current is None:
+            return update  # deleted while it was being checked
+        was_verified = current.get('is_verified', False)
+        update["check_failures"] = current['check_failures']
+        if was_verified and update["check_failures"] >= REVALIDATE_MAX_FAILURES:
+            # The record or file has been gone for several checks: stop accepting its traffic
+            update.update(is_verified=False, verified_at=None, check_failures=0)
+    is_verified = update.get("is_verified", was_verified)
+    update["next_check_at"] = (now + timedelta(seconds=next_check_delay(is_verified, update["check_failures"]))).isoformat()
+
+    await db.domains.update_one({"id": domain['id']}, {"$set": update})
+    if is_verified != was_verified:
+        DOMAIN_CACHE.invalidate(domain['domain'])
+    return update
+
+async def claim_due_domain() -> Optional[dict]:
+    """Atomically take the most overdue domain for this worker by pushing its next_check_at ahead"""
+    now = datetime.now(timezone.utc)
+    return await db.domains.find_one_and_update(
+        # Domains created before scheduling existed have no next_check_at yet
+        {"$or": [{"next_check_at": {"$lte": now.isoformat()}}, {"next_check_at": None}]},
+        {"$set": {"next_check_at": (now + timedelta(seconds=REVERIFY_CLAIM_SECONDS)).isoformat()}},
+        projection={"_id": 0, "id": 1, "domain": 1, "verification_token": 1, "is_verified": 1, "check_failures": 1},
+        sort=[("next_check_at", 1)]
+    )
+
+async def reverify_due_domains() -> dict:
+    """Check up to one batch of domains whose next_check_at has passed"""
+    REVERIFY_STATUS.update(running=True, last_started_at=datetime.now(timezone.utc).isoformat())
+    counts = Counter()
+    remaining = REVERIFY_BATCH_SIZE
+
+    async def check(domain):
+        try:
+            method, errors = await check_domain_ownership(domain)
+            update = await record_verification_result(domain, method, errors)
+        except Exception as e:
+            logger.error(f"Re-verification of {domain['domain']} failed: {e}")
+            return
+        counts["checked"] += 1
+        if method:
+            counts["verified"] += 1
+        else:
+            counts["failed"] += 1
+            if domain.get('is_verified') and not update.get('is_verified', True):
+                counts["unverified"] += 1
+                logger.warning(f"Domain {domain['domain']} lost verification: {' | '.join(errors)}")
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            domain = await claim_due_domain()
+            if domain is None:
+                return
+            await check(domain)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(REVERIFY_CONCURRENCY)))
+    finally:
+        REVERIFY_STATUS["running"] = False
+    for key in ("checked", "verified", "failed", "unverified"):
+        REVERIFY_STATUS[key] = counts[key]
+    REVERIFY_STATUS["last_finished_at"] = datetime.now(timezone.utc).isoformat()
+    if counts["checked"]:
+        logger.info(f"Re-verified {counts['checked']} domains: {counts['verified']} verified, "
+                    f"{counts['failed']} failed, {counts['unverified']} lost verification")
+    return {key: REVERIFY_STATUS[key] for key in ("checked", "verified", "failed", "unverified")}
+
+async def reverification_loop():
+    while True:
+        await asyncio.sleep(REVERIFY_INTERVAL)
+        try:
+            await reverify_due_domains()
+        except Exception as e:
+            logger.error(f"Re-verification run failed: {e}")
 
 @api_router.post("/domains/{domain_id}/verify")
 async def verify_domain(domain_id: str, user: dict = Depends(get_current_user)):
@@ -703,96 +2540,20 @@ async def verify_domain(domain_id: str, user: dict = Depends(get_current_user)):
     if domain['is_verified']:
         return {"verified": True, "message": "Domain already verified"}
     
-    verification_errors = []
-    
-    # Try DNS TXT verification
-    try:
-        import dns.resolver
-        
-        # Create resolver with custom settings to avoid caching issues
-        resolver = dns.resolver.Resolver()
-        resolver.cache = dns.resolver.Cache()  # Fresh cache
-        resolver.lifetime = 10  # 10 second timeout
-        
-        verification_string = f"aibot-detect={domain['verification_token']}"
-        
-        try:
-            answers = resolver.resolve(domain['domain'], 'TXT')
-            found_records = []
-            
-            for rdata in answers:
-                for txt_string in rdata.strings:
-                    txt_decoded = txt_string.decode('utf-8') if isinstance(txt_string, bytes) else txt_string
-                    found_records.append(txt_decoded)
-                    
-                    if verification_string in txt_decoded:
-                        # Verified!
-                        await db.domains.update_one(
-                            {"id": domain_id},
-                            {"$set": {
-                                "is_verified": True,
-                                "verified_at": datetime.now(timezone.utc).isoformat()
-                            }}
-                        )
-                        return {"verified": True, "method": "DNS", "message": "Domain verified via DNS TXT record"}
-            
-            # Record found but doesn't match
-            if found_records:
-                verification_errors.append(f"DNS TXT records found but don't match. Found: {', '.join(found_records[:3])}")
-            else:
-                verification_errors.append("No TXT records found for domain")
-                
-        except dns.resolver.NXDOMAIN:
-            verification_errors.append(f"Domain {domain['domain']} does not exist")
-        except dns.resolver.NoAnswer:
-            verification_errors.append("No TXT records found for domain")
-        except dns.resolver.Timeout:
-            verification_errors.append("DNS query timed out. Please try again.")
-        except Exception as dns_err:
-            verification_errors.append(f"DNS lookup error: {str(dns_err)}")
-            
-    except ImportError:
-        verification_errors.append("DNS verification not available (dnspython not installed)")
-    except Exception as e:
-        logging.error(f"DNS verification error: {e}")
-        verification_errors.append(f"DNS verification failed: {str(e)}")
-    
-    # Try file verification
-    try:
-        file_url = f"https://{domain['domain']}/.well-known/aibot-detect.txt"
-        response = requests.get(file_url, timeout=5, verify=True)
-        
-        if response.status_code == 200:
-            if domain['verification_token'] in response.text:
-                await db.domains.update_one(
-                    {"id": domain_id},
-                    {"$set": {
-                        "is_verified": True,
-                        "verified_at": datetime.now(timezone.utc).isoformat()
-                    }}
-                )
-                return {"verified": True, "method": "FILE", "message": "Domain verified via file"}
-            else:
-                verification_errors.append(f"File found but token doesn't match. Expected: {domain['verification_token']}")
-        else:
-            verification_errors.append(f"File not found (HTTP {response.status_code})")
-    except requests.exceptions.SSLError:
-        verification_errors.append("SSL certificate error. Ensure your domain has a valid SSL certificate.")
-    except requests.exceptions.ConnectionError:
-        verification_errors.append(f"Cannot connect to {domain['domain']}. Ensure the domain is accessible.")
-    except requests.exceptions.Timeout:
-        verification_errors.append("File verification timed out")
-    except Exception as e:
-        logging.error(f"File verification error: {e}")
-        verification_errors.append(f"File verification failed: {str(e)}")
+    method, verification_errors = await check_domain_ownership(domain)
+    await record_verification_result(domain, method, verification_errors)
+    if method == "DNS":
+        return {"verified": True, "method": "DNS", "message": "Domain verified via DNS TXT record"}
+    if method == "FILE":
+        return {"verified": True, "method": "FILE", "message": "Domain verified via file"}
     
     # Return detailed error message
     error_message = " | ".join(verification_errors) if verification_errors else "Verification failed"
     return {
         "verified": False, 
         "message": error_message,
-        "expected_txt_record": f"aibot-detect={domain['verification_token']}",
-        "expected_file_url": f"https://{domain['domain']}/.well-known/aibot-detect.txt",
+        "expected_txt_record": verification_record(domain),
+        "expected_file_url": verification_file_url(domain['domain']),
         "expected_file_content": domain['verification_token']
     }
 
@@ -803,48 +2564,26 @@ async def check_domain_dns(domain_id: str, user: dict = Depends(get_current_user
     if not domain:
         raise HTTPException(status_code=404, detail="Domain not found")
     
+    lookup = await lookup_txt_records(domain['domain'])
     result = {
         "domain": domain['domain'],
-        "expected_record": f"aibot-detect={domain['verification_token']}",
-        "found_records": [],
-        "status": "unknown"
+        "expected_record": verification_record(domain),
+        "found_records": lookup["records"],
+        "status": lookup["status"]
     }
-    
-    try:
-        import dns.resolver
-        resolver = dns.resolver.Resolver()
-        resolver.cache = dns.resolver.Cache()
-        
-        answers = resolver.resolve(domain['domain'], 'TXT')
-        for rdata in answers:
-            for txt_string in rdata.strings:
-                txt_decoded = txt_string.decode('utf-8') if isinstance(txt_string, bytes) else txt_string
-                result["found_records"].append(txt_decoded)
-        
-        if result["found_records"]:
-            result["status"] = "records_found"
-            if result["expected_record"] in result["found_records"]:
-                result["status"] = "match_found"
-        else:
-            result["status"] = "no_records"
-            
-    except dns.resolver.NXDOMAIN:
-        result["status"] = "domain_not_found"
-        result["error"] = "Domain does not exist"
-    except dns.resolver.NoAnswer:
-        result["status"] = "no_txt_records"
-        result["error"] = "No TXT records found"
-    except Exception as e:
-        result["status"] = "error"
-        result["error"] = str(e)
+    if result["status"] == "records_found" and result["expected_record"] in result["found_records"]:
+        result["status"] = "match_found"
+    if lookup["error"]:
+        result["error"] = lookup["error"]
     
     return result
 
 @api_router.delete("/domains/{domain_id}")
 async def delete_domain(domain_id: str, user: dict = Depends(get_current_user)):
-    result = await db.domains.delete_one({"id": domain_id, "user_id": user['id']})
-    if result.deleted_count == 0:
+    domain = await db.domains.find_one_and_delete({"id": domain_id, "user_id": user['id']}, {"_id": 0, "domain": 1})
+    if not domain:
         raise HTTPException(status_code=404, detail="Domain not found")
+    DOMAIN_CACHE.invalidate(domain['domain'])
     return {"success": True}
 
 # API Key Routes
@@ -871,18 +2610,36 @@ async def get_api_keys(user: dict = Depends(get_current_user)):
 
 @api_router.delete("/api-keys/{key_id}")
 async def delete_api_key(key_id: str, user: dict = Depends(get_current_user)):
-    result = await db.api_keys.delete_one({"id": key_id, "user_id": user['id']})
-    if result.deleted_count == 0:
+    api_key_doc = await db.api_keys.find_one_and_delete({"id": key_id, "user_id": user['id']}, {"_id": 0, "key": 1})
+    if not api_key_doc:
         raise HTTPException(status_code=404, detail="API key not found")
+    API_KEY_CACHE.invalidate(api_key_doc['key'])
     return {"success": True}
 
 # change by Subhro added (request: Request)
 # Traffic Logging Routes
 @api_router.post("/traffic/log")
 async def log_traffic(log_data: TrafficLogCreate, request: Request):
-        
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        result = await ingest_traffic_event(log_data, request, started)
+        outcome = "ok"
+        return result
+    except HTTPException as e:
+        outcome = str(e.status_code)
+        raise
+    finally:
+        INGEST_SECONDS.observe(time.perf_counter() - started, outcome)
+
+async def ingest_traffic_event(log_data: TrafficLogCreate, request: Request, started: float) -> dict:
+    global GEO_LOOKUPS_IN_FLIGHT
+    # Each observe_stage call below records the stage that just ended in INGEST_STAGE_SECONDS
+    stage_started = started
+
     # Find domain
-    domain = await db.domains.find_one({"domain": log_data.domain, "is_verified": True}, {"_id": 0})
+    domain = await get_verified_domain(log_data.domain)
+    stage_started = observe_stage("domain_lookup", stage_started)
     if not domain:
         raise HTTPException(status_code=404, detail="Domain not found or not verified")
 
@@ -890,7 +2647,8 @@ async def log_traffic(log_data: TrafficLogCreate, request: Request):
     # but not that it belongs to the domain owner.)
 
     # Verify API key
-    api_key_doc = await db.api_keys.find_one({"key": log_data.api_key, "is_active": True}, {"_id": 0})
+    api_key_doc = await get_active_api_key(log_data.api_key)
+    stage_started = observe_stage("key_lookup", stage_started)
     if not api_key_doc:
         raise HTTPException(status_code=401, detail="Invalid API key")
 
@@ -908,26 +2666,36 @@ async def log_traffic(log_data: TrafficLogCreate, request: Request):
     headers = dict(request.headers)
     real_ip = get_real_ip(headers, log_data.ip_address)
     detected_bot, bot_provider, confidence, risk_level = detect_bot(log_data.user_agent, real_ip)
+    stage_started = observe_stage("detection", stage_started)
 
     # code update by Subhro adding fingerprint during logging
     # Find fingerprint 
     fingerprint = generate_fingerprint(log_data.user_agent, headers, real_ip)
+    stage_started = observe_stage("fingerprint", stage_started)
     
     # Find behavior  
     behavior = analyze_behavior(fingerprint, log_data.request_path)
+    stage_started = observe_stage("behavior", stage_started)
     
     # Get geolocation
     # geo_location = get_geo_location(real_ip)
     # code change by Subhro (Make it async or run in thread pool, or make it optional/background task:)
     
     loop = asyncio.get_event_loop()
-    geo_location = await loop.run_in_executor(GEO_EXECUTOR, get_geo_location, real_ip)
+    GEO_LOOKUPS_IN_FLIGHT += 1
+    try:
+        geo_location = await loop.run_in_executor(GEO_EXECUTOR, get_geo_location, real_ip)
+    finally:
+        GEO_LOOKUPS_IN_FLIGHT -= 1
+    stage_started = observe_stage("geo_lookup", stage_started)
 
 
     # code update by Subhro (if request as coming from a known bot and an admin has marked that bot as blocked, 
     # immediately deny the request)
 
-    if detected_bot and await is_bot_blocked(detected_bot):
+    blocked = bool(detected_bot) and await is_bot_blocked(detected_bot)
+    stage_started = observe_stage("policy_check", stage_started)
+    if blocked:
         raise HTTPException(status_code=403, detail="Bot access blocked")
 
     
@@ -950,11 +2718,20 @@ async def log_traffic(log_data: TrafficLogCreate, request: Request):
     
     doc = traffic_log.model_dump()
     doc['timestamp'] = doc['timestamp'].isoformat()
-    await db.traffic_logs.insert_one(doc)
+    collection = await traffic_collection_for_write(traffic_log.timestamp)
+    await collection.insert_one(doc)
+    stage_started = observe_stage("insert", stage_started)
+    count_traffic_delta(traffic_log.timestamp, "total_logs")
+    if detected_bot:
+        count_traffic_delta(traffic_log.timestamp, "bot_detections")
+    INGEST_BOTS.inc(detected_bot or "none")
+    INGEST_BEHAVIORS.inc(behavior)
+    INGEST_RISK.inc(risk_level)
     
     # Check alerts if bot detected
     if detected_bot and confidence > 0.5:
         await check_and_send_alerts(domain['user_id'], domain['id'])
+        observe_stage("alerting", stage_started)
 
 
 
@@ -965,12 +2742,12 @@ async def check_and_send_alerts(user_id: str, domain_id: str):
     """Check if alert threshold is reached and send alerts"""
     # Count recent bot detections (last hour)
     one_hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
-    recent_bots = await db.traffic_logs.count_documents({
+    recent_bots = await count_traffic_logs({
         "user_id": user_id,
         "domain_id": domain_id,
         "detected_bot": {"$ne": None},
         "timestamp": {"$gte": one_hour_ago.isoformat()}
-    })
+    }, start=one_hour_ago)
     
     # Get active alerts
     alerts = await db.alerts.find({"user_id": user_id, "is_active": True}, {"_id": 0}).to_list(100)
@@ -980,23 +2757,59 @@ async def check_and_send_alerts(user_id: str, domain_id: str):
             # Send alert (simplified - just log for now)
             logging.info(f"ALERT: User {user_id} has {recent_bots} bot detections. Alert: {alert['destination']}")
 
+MAX_TRAFFIC_LOG_PAGE = 1000
+
+# Keyset pagination: pages are ordered by (timestamp, id) descending and the cursor carries the
+# last row's key, so page N costs the same index range scan as page 1 (no skip)
 @api_router.get("/traffic/logs", response_model=List[TrafficLogResponse])
 async def get_traffic_logs(
     domain_id: Optional[str] = None,
+    bot: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    behavior_type: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
     limit: int = 100,
     user: dict = Depends(get_current_user)
 ):
+    limit = max(1, min(limit, MAX_TRAFFIC_LOG_PAGE))
+
     query = {"user_id": user['id']}
     if domain_id:
         query["domain_id"] = domain_id
-    
-    logs = await db.traffic_logs.find(query, {"_id": 0}).sort("timestamp", -1).limit(limit).to_list(limit)
-    
-    for log in logs:
-        if isinstance(log.get('timestamp'), str):
-            log['timestamp'] = datetime.fromisoformat(log['timestamp'])
-    
-    return [TrafficLogResponse(**log) for log in logs]
+    if bot:
+        query["detected_bot"] = bot
+    if risk_level:
+        query["risk_level"] = risk_level
+    if behavior_type:
+        query["behavior_type"] = behavior_type
+    if start or end:
+        query["timestamp"] = {}
+        if start:
+            query["timestamp"]["$gte"] = to_utc_iso(start)
+        if end:
+            query["timestamp"]["$lt"] = to_utc_iso(end)
+
+    if cursor:
+        last_timestamp, last_id = decode_cursor(cursor, 2)
+        query["$or"] = [
+            {"timestamp": {"$lt": last_timestamp}},
+            {"timestamp": last_timestamp, "id": {"$lt": last_id}}
+        ]
+
+    # Fetch one extra row to know whether another page exists
+    logs = await find_traffic_logs(
+        query, TRAFFIC_LOG_PROJECTION, start=start, end=end,
+        sort=[("timestamp", -1), ("id", -1)], limit=limit + 1
+    )
+
+    headers = {}
+    if len(logs) > limit:
+        logs = logs[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(logs[-1]['timestamp'], logs[-1]['id'])
+
+    return OrjsonResponse(logs, headers=headers)
 
 @api_router.get("/traffic/stats", response_model=StatsResponse)
 async def get_traffic_stats(
@@ -1012,7 +2825,7 @@ async def get_traffic_stats(
     start_date = datetime.now(timezone.utc) - timedelta(days=days)
     query["timestamp"] = {"$gte": start_date.isoformat()}
     
-    logs = await db.traffic_logs.find(query, {"_id": 0}).to_list(10000)
+    logs = await find_traffic_logs(query, {"_id": 0}, start=start_date, limit=10000)
     
     total_requests = len(logs)
     bot_requests = sum(1 for log in logs if log.get('detected_bot'))
@@ -1046,13 +2859,21 @@ async def get_traffic_stats(
 async def export_traffic_logs(
     format: str = "json",
     domain_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
     user: dict = Depends(get_current_user)
 ):
     query = {"user_id": user['id']}
     if domain_id:
         query["domain_id"] = domain_id
+    if start or end:
+        query["timestamp"] = {}
+        if start:
+            query["timestamp"]["$gte"] = to_utc_iso(start)
+        if end:
+            query["timestamp"]["$lt"] = to_utc_iso(end)
     
-    logs = await db.traffic_logs.find(query, {"_id": 0}).to_list(10000)
+    logs = await find_traffic_logs(query, {"_id": 0}, start=start, end=end, limit=10000)
     
     if format == "csv":
         import csv
@@ -1108,61 +2929,155 @@ async def delete_alert(alert_id: str, user: dict = Depends(get_current_user)):
 # Super Admin Routes
 @api_router.get("/admin/users")
 async def get_all_users(admin: dict = Depends(get_super_admin)):
-    users = await db.users.find({}, {"_id": 0, "password_hash": 0}).to_list(10000)
-    for u in users:
-        if isinstance(u.get('created_at'), str):
-            u['created_at'] = datetime.fromisoformat(u['created_at'])
-    return users
+    users = await db.users.find({}, ADMIN_USER_PROJECTION).to_list(10000)
+    return OrjsonResponse(users)
 
 @api_router.get("/admin/stats")
 async def get_admin_stats(admin: dict = Depends(get_super_admin)):
-    total_users = await db.users.count_documents({})
-    total_domains = await db.domains.count_documents({})
-    verified_domains = await db.domains.count_documents({"is_verified": True})
-    total_logs = await db.traffic_logs.count_documents({})
-    bot_detections = await db.traffic_logs.count_documents({"detected_bot": {"$ne": None}})
+    if not ADMIN_STATS_SNAPSHOT:
+        await refresh_admin_stats()
     
     # Recent activity across all users
-    recent_logs = await db.traffic_logs.find({}, {"_id": 0}).sort("timestamp", -1).limit(50).to_list(50)
+    recent_logs = await find_traffic_logs({}, {"_id": 0}, sort=[("timestamp", -1)], limit=50)
     
     return {
-        "total_users": total_users,
-        "total_domains": total_domains,
-        "verified_domains": verified_domains,
-        "total_logs": total_logs,
-        "bot_detections": bot_detections,
+        **ADMIN_STATS_SNAPSHOT,
         "recent_activity": recent_logs
     }
 
+MAX_ADMIN_PAGE = 1000
+
 @api_router.get("/admin/domains")
-async def get_all_domains(admin: dict = Depends(get_super_admin)):
-    domains = await db.domains.find({}, {"_id": 0}).to_list(10000)
-    
-    # Get user emails for each domain
-    for domain in domains:
-        user = await db.users.find_one({"id": domain['user_id']}, {"_id": 0, "email": 1})
-        domain['user_email'] = user.get('email') if user else 'Unknown'
-        if isinstance(domain.get('created_at'), str):
-            domain['created_at'] = datetime.fromisoformat(domain['created_at'])
-    
-    return domains
+async def get_all_domains(
+    page: int = 1,
+    limit: int = MAX_ADMIN_PAGE,
+    search: Optional[str] = None,
+    admin: dict = Depends(get_super_admin)
+):
+    page = max(1, page)
+    limit = max(1, min(limit, MAX_ADMIN_PAGE))
+
+    # Owner emails are joined server-side in the same query instead of one users lookup per domain
+    join_owner = [
+        {"$lookup": {"from": "users", "localField": "user_id", "foreignField": "id", "as": "owner"}},
+        {"$addFields": {"user_email": {"$ifNull": [{"$arrayElemAt": ["$owner.email", 0]}, "Unknown"]}}},
+    ]
+    page_stages = [
+        # id breaks created_at ties so skip/limit pages neither repeat nor miss domains
+        {"$sort": {"created_at": -1, "id": -1}},
+        {"$skip": (page - 1) * limit},
+        {"$limit": limit},
+    ]
+    if search:
+        # Matches on the domain name or the owner's email, so the join has to come before the match
+        pattern = {"$regex": re.escape(search), "$options": "i"}
+        matched = join_owner + [{"$match": {"$or": [{"domain": pattern}, {"owner.email": pattern}]}}]
+        pipeline = matched + page_stages + [{"$project": {"_id": 0, "owner": 0}}]
+        count_pipeline = matched + [{"$count": "total"}]
+    else:
+        pipeline = page_stages + join_owner + [{"$project": {"_id": 0, "owner": 0}}]
+        count_pipeline = [{"$count": "total"}]
+    domains, counted = await asyncio.gather(
+        db.domains.aggregate(pipeline).to_list(limit),
+        db.domains.aggregate(count_pipeline).to_list(1),
+    )
+    total = counted[0]["total"] if counted else 0
+    return OrjsonResponse(domains, headers={"X-Total-Count": str(total)})
+
+@api_router.put("/admin/user/{user_id}/plan")
+async def update_user_plan(user_id: str, plan_data: PlanUpdate, admin: dict = Depends(get_super_admin)):
+    if plan_data.plan not in PLAN_RETENTION_DAYS:
+        raise HTTPException(status_code=400, detail=f"Unknown plan. Choose one of: {', '.join(PLAN_RETENTION_DAYS)}")
+    result = await db.users.update_one({"id": user_id}, {"$set": {"plan": plan_data.plan}})
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="User not found")
+    USER_CACHE.invalidate(user_id)
+    return {"success": True, "plan": plan_data.plan, "retention_days": PLAN_RETENTION_DAYS[plan_data.plan]}
+
+@api_router.get("/admin/cache-stats")
+async def get_cache_stats(admin: dict = Depends(get_super_admin)):
+    return {
+        "user_cache": USER_CACHE.stats(),
+        "domain_cache": DOMAIN_CACHE.stats(),
+        "api_key_cache": API_KEY_CACHE.stats(),
+        "dns_check_cache": DNS_CHECK_CACHE.stats(),
+        "file_check_cache": FILE_CHECK_CACHE.stats(),
+    }
+
+@api_router.get("/admin/retention")
+async def get_retention_status(admin: dict = Depends(get_super_admin)):
+    return {**RETENTION_STATUS, "plan_retention_days": PLAN_RETENTION_DAYS}
+
+@api_router.post("/admin/retention/run")
+async def run_retention(admin: dict = Depends(get_super_admin)):
+    if RETENTION_STATUS["running"]:
+        return {"started": False, "message": "Retention pass already running"}
+    start_admin_job(apply_retention())
+    return {"started": True}
+
+@api_router.get("/admin/reverification")
+async def get_reverification_status(admin: dict = Depends(get_super_admin)):
+    pending, due = await asyncio.gather(
+        db.domains.count_documents({"is_verified": False}),
+        db.domains.count_documents({"next_check_at": {"$lte": datetime.now(timezone.utc).isoformat()}}),
+    )
+    return {**REVERIFY_STATUS, "pending_domains": pending, "due_domains": due}
+
+@api_router.post("/admin/reverification/run")
+async def run_reverification(admin: dict = Depends(get_super_admin)):
+    if REVERIFY_STATUS["running"]:
+        return {"started": False, "message": "Re-verification already running", **REVERIFY_STATUS}
+    REVERIFY_STATUS["running"] = True  # until the job itself starts
+    start_admin_job(reverify_due_domains())
+    return {"started": True, **REVERIFY_STATUS}
+
+@api_router.get("/admin/traffic-partitions")
+async def get_traffic_partitions(admin: dict = Depends(get_super_admin)):
+    await load_traffic_partitions()
+    names = sorted(TRAFFIC_PARTITIONS)
+    counts = await asyncio.gather(*(db[name].estimated_document_count() for name in names))
+    return {
+        "mode": TRAFFIC_LOG_PARTITIONING or "none",
+        "partitions": [
+            {
+                "name": name,
+                "start": TRAFFIC_PARTITIONS[name][0].isoformat(),
+                "end": TRAFFIC_PARTITIONS[name][1].isoformat(),
+                "estimated_count": count,
+            }
+            for name, count in zip(names, counts)
+        ]
+    }
+
+@api_router.delete("/admin/traffic-partitions/{name}")
+async def drop_traffic_partition(name: str, admin: dict = Depends(get_super_admin)):
+    await load_traffic_partitions()
+    if name not in TRAFFIC_PARTITIONS:
+        raise HTTPException(status_code=404, detail="Partition not found")
+    if name == partition_name(datetime.now(timezone.utc)):
+        raise HTTPException(status_code=400, detail="Cannot drop the partition currently receiving writes")
+    # Same lease as apply_retention, so the partition is never rolled up by two jobs at once
+    # (this worker's own retention pass holds the lease too, hence the running check)
+    if RETENTION_STATUS["running"] or not await acquire_lease("retention", RETENTION_LEASE_SECONDS):
+        raise HTTPException(status_code=409, detail="Retention is running, try again when it has finished")
+    try:
+        rolled_up = await roll_up_and_drop_partition(name)
+    finally:
+        await release_lease("retention")
+    return {"success": True, "rolled_up": rolled_up}
 
 @api_router.get("/admin/user/{user_id}/activity")
 async def get_user_activity(user_id: str, admin: dict = Depends(get_super_admin)):
-    # Get user details
-    user = await db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0})
+    # User, domains, recent logs and API keys are independent, so fetch them concurrently
+    user, domains, logs, api_keys = await asyncio.gather(
+        db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0}),
+        db.domains.find({"user_id": user_id}, {"_id": 0}).to_list(1000),
+        find_traffic_logs({"user_id": user_id}, {"_id": 0}, sort=[("timestamp", -1)], limit=100),
+        db.api_keys.find({"user_id": user_id}, {"_id": 0}).to_list(1000),
+    )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Get user's domains
-    domains = await db.domains.find({"user_id": user_id}, {"_id": 0}).to_list(1000)
-    
-    # Get user's traffic logs
-    logs = await db.traffic_logs.find({"user_id": user_id}, {"_id": 0}).sort("timestamp", -1).limit(100).to_list(100)
-    
-    # Get user's API keys
-    api_keys = await db.api_keys.find({"user_id": user_id}, {"_id": 0}).to_list(1000)
-    
     return {
         "user": user,
         "domains": domains,
@@ -1182,34 +3097,40 @@ async def create_blog(blog_data: BlogCreate, admin: dict = Depends(get_super_adm
         # Add random suffix to make it unique
         slug = f"{slug}-{secrets.token_urlsafe(4)}"
     
-    # Calculate reading time
-    reading_time = calculate_reading_time(blog_data.content)
+    # Text, reading time, excerpt, search tokens and outline in one pass over the HTML
+    processed = process_blog_content(blog_data.content)
+    excerpt = blog_data.excerpt or processed['auto_excerpt']
     
     # Create blog
     blog = Blog(
         title=blog_data.title,
         slug=slug,
         content=blog_data.content,
-        excerpt=blog_data.excerpt,
+        excerpt=excerpt,
         featured_image=blog_data.featured_image,
         author_id=admin['id'],
         author_name=admin['email'].split('@')[0],
         status=blog_data.status,
         seo_title=blog_data.seo_title or blog_data.title,
-        seo_description=blog_data.seo_description or blog_data.excerpt,
+        seo_description=blog_data.seo_description or excerpt,
         seo_keywords=blog_data.seo_keywords,
         tags=blog_data.tags,
-        reading_time=reading_time,
+        reading_time=processed['reading_time'],
+        word_count=processed['word_count'],
+        outline=processed['outline'],
         published_at=blog_data.published_at if blog_data.status == "published" else None
     )
     
-    doc = blog.model_dump()
+    doc = {**blog.model_dump(), **processed}
     doc['created_at'] = doc['created_at'].isoformat()
     doc['updated_at'] = doc['updated_at'].isoformat()
     if doc.get('published_at'):
         doc['published_at'] = doc['published_at'].isoformat()
     
     await db.blogs.insert_one(doc)
+    await adjust_tag_counts([], published_tags(doc))
+    BLOG_RESPONSE_CACHE.clear()
+    BLOG_COUNT_CACHE.clear()
     
     return BlogResponse(**blog.model_dump())
 
@@ -1233,9 +3154,11 @@ async def update_blog(blog_id: str, blog_data: BlogUpdate, admin: dict = Depends
         if slug_exists:
             update_data['slug'] = f"{update_data['slug']}-{secrets.token_urlsafe(4)}"
     
-    # Recalculate reading time if content changed
+    # Reprocess the content if it changed
     if 'content' in update_data:
-        update_data['reading_time'] = calculate_reading_time(update_data['content'])
+        update_data.update(process_blog_content(update_data['content']))
+    if 'excerpt' in update_data and not update_data['excerpt']:
+        update_data['excerpt'] = update_data.get('auto_excerpt') or existing.get('auto_excerpt', '')
     
     # Update published_at if status changed to published
     if 'status' in update_data and update_data['status'] == 'published' and not existing.get('published_at'):
@@ -1244,9 +3167,12 @@ async def update_blog(blog_id: str, blog_data: BlogUpdate, admin: dict = Depends
     update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
     
     await db.blogs.update_one({"id": blog_id}, {"$set": update_data})
+    BLOG_RESPONSE_CACHE.clear()
+    BLOG_COUNT_CACHE.clear()
     
     # Get updated blog
-    updated_blog = await db.blogs.find_one({"id": blog_id}, {"_id": 0})
+    updated_blog = await db.blogs.find_one({"id": blog_id}, BLOG_DETAIL_PROJECTION)
+    await adjust_tag_counts(published_tags(existing), published_tags(updated_blog))
     
     # Convert datetime strings back to datetime objects
     for field in ['created_at', 'updated_at', 'published_at']:
@@ -1257,38 +3183,38 @@ async def update_blog(blog_id: str, blog_data: BlogUpdate, admin: dict = Depends
 
 @api_router.delete("/admin/blogs/{blog_id}")
 async def delete_blog(blog_id: str, admin: dict = Depends(get_super_admin)):
-    result = await db.blogs.delete_one({"id": blog_id})
-    if result.deleted_count == 0:
+    deleted = await db.blogs.find_one_and_delete({"id": blog_id}, {"_id": 0, "status": 1, "tags": 1})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Blog not found")
+    await adjust_tag_counts(published_tags(deleted), [])
+    BLOG_RESPONSE_CACHE.clear()
+    BLOG_COUNT_CACHE.clear()
     return {"success": True}
 
 @api_router.get("/admin/blogs", response_model=List[BlogListResponse])
 async def get_all_blogs_admin(
     status: Optional[str] = None,
     search: Optional[str] = None,
+    page: int = 1,
+    limit: int = 1000,
     admin: dict = Depends(get_super_admin)
 ):
+    page = max(1, page)
+    limit = max(1, min(limit, 1000))
     query = {}
+    projection = BLOG_LIST_PROJECTION
+    sort = [("created_at", -1)]
     if status:
         query["status"] = status
     if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"excerpt": {"$regex": search, "$options": "i"}}
-        ]
-    
-    blogs = await db.blogs.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
+        projection, sort = add_blog_text_search(query, projection, search)
     
-    for blog in blogs:
-        for field in ['created_at', 'updated_at', 'published_at']:
-            if blog.get(field) and isinstance(blog[field], str):
-                blog[field] = datetime.fromisoformat(blog[field])
-    
-    return [BlogListResponse(**blog) for blog in blogs]
+    blogs = await db.blogs.find(query, projection).sort(sort).skip((page - 1) * limit).limit(limit).to_list(limit)
+    return OrjsonResponse(blogs)
 
 @api_router.get("/admin/blogs/{blog_id}", response_model=BlogResponse)
 async def get_blog_by_id_admin(blog_id: str, admin: dict = Depends(get_super_admin)):
-    blog = await db.blogs.find_one({"id": blog_id}, {"_id": 0})
+    blog = await db.blogs.find_one({"id": blog_id}, BLOG_DETAIL_PROJECTION)
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
     
@@ -1299,79 +3225,299 @@ async def get_blog_by_id_admin(blog_id: str, admin: dict = Depends(get_super_adm
     return BlogResponse(**blog)
 
 # Blog Routes - Public
+# Public blog responses are cached rendered (JSON bytes plus ETag / Last-Modified) per route and
+# query. Admin blog writes clear the cache; BLOG_CACHE_TTL bounds staleness across workers.
+# Browsers and CDNs revalidate with If-None-Match / If-Modified-Since and get a bodiless 304.
+BLOG_CACHE_TTL = float(os.environ.get('BLOG_CACHE_TTL_SECONDS', 60))
+BLOG_CACHE_MAX_AGE = int(os.environ.get('BLOG_CACHE_MAX_AGE', 60))
+BLOG_RESPONSE_CACHE = TTLCache(BLOG_CACHE_TTL, maxsize=2000)
+
+def latest_update(blogs: List[dict]) -> Optional[datetime]:
+    stamps = [blog['updated_at'] for blog in blogs if blog.get('updated_at')]
+    return as_utc(datetime.fromisoformat(max(stamps))) if stamps else None
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+async def cached_blog_response(request: Request, key: tuple, build) -> Response:
+    """Serve a public blog response from BLOG_RESPONSE_CACHE, building it with build() on a miss.
+
+    build() returns (content, last_modified, extra_headers).
+    """
+    entry = BLOG_RESPONSE_CACHE.get(key)
+    if entry is TTLCache.MISSING:
+        content, last_modified, extra_headers = await build()
+        body = orjson.dumps(content)
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        entry = (body, etag, last_modified, extra_headers)
+        BLOG_RESPONSE_CACHE.set(key, entry)
+
+    body, etag, last_modified, extra_headers = entry
+    headers = {**extra_headers, "ETag": etag, "Cache-Control": f"public, max-age={BLOG_CACHE_MAX_AGE}"}
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+# View counts are buffered per slug and flushed periodically, so a viral post costs one
+# write per flush interval instead of one per page view
+BLOG_VIEW_FLUSH_INTERVAL = float(os.environ.get('BLOG_VIEW_FLUSH_INTERVAL_SECONDS', 10))
+BLOG_VIEW_BUFFER = Counter()
+
+async def flush_blog_views():
+    if not BLOG_VIEW_BUFFER:
+        return
+    pending = dict(BLOG_VIEW_BUFFER)
+    BLOG_VIEW_BUFFER.clear()
+    operations = [UpdateOne({"slug": slug}, {"$inc": {"view_count": count}}) for slug, count in pending.items()]
+    try:
+        await db.blogs.bulk_write(operations, ordered=False)
+    except asyncio.CancelledError:
+        # Shutdown cancelled the loop mid-write; keep the counts for the final flush
+        BLOG_VIEW_BUFFER.update(pending)
+        raise
+    except Exception as e:
+        # Put the counts back so the next flush retries them
+        BLOG_VIEW_BUFFER.update(pending)
+        logger.error(f"Blog view flush failed: {e}")
+
+async def blog_view_flush_loop():
+    while True:
+        await asyncio.sleep(BLOG_VIEW_FLUSH_INTERVAL)
+        await flush_blog_views()
+
+BLOG_LIST_CACHE_PROJECTION = {**BLOG_LIST_PROJECTION, "updated_at": 1}
+
+# Public listing pages are keyset-paginated on (published_at, id). Page numbers still work for
+# the first MAX_BLOG_OFFSET_PAGES pages; deeper pages need the X-Next-Cursor of the previous one,
+# so no request skips more than a few pages of the (status, published_at, id) index.
+# Search results are ranked by relevance, which has no stable cursor; they are paged by number
+# over the best MAX_BLOG_SEARCH_RESULTS matches instead.
+MAX_BLOG_OFFSET_PAGES = 5
+MAX_BLOG_PAGE_SIZE = 50
+MAX_BLOG_SEARCH_RESULTS = 200
+BLOG_COUNT_CACHE = TTLCache(BLOG_CACHE_TTL)  # (tag, search) -> published blog count
+
+async def count_published_blogs(tag: Optional[str], search: Optional[str] = None) -> int:
+    """Published posts with the tag, or matches of the search capped at MAX_BLOG_SEARCH_RESULTS"""
+    total = BLOG_COUNT_CACHE.get((tag, search))
+    if total is TTLCache.MISSING:
+        query = {"status": "published"}
+        if tag:
+            query["tags"] = tag
+        if search:
+            add_blog_text_search(query, {}, search)
+            total = await db.blogs.count_documents(query, limit=MAX_BLOG_SEARCH_RESULTS)
+        else:
+            total = await db.blogs.count_documents(query)
+        BLOG_COUNT_CACHE.set((tag, search), total)
+    return total
+
+def blog_cursor_filter(cursor: str) -> dict:
+    published_at, blog_id = decode_cursor(cursor, 2, nullable=(0,))
+    if published_at is None:
+        # Published posts without a date sort last
+        return {"published_at": None, "id": {"$lt": blog_id}}
+    return {"$or": [
+        {"published_at": {"$lt": published_at}},
+        {"published_at": published_at, "id": {"$lt": blog_id}},
+        {"published_at": None},
+    ]}
+
 @api_router.get("/blogs", response_model=List[BlogListResponse])
 async def get_published_blogs(
+    request: Request,
     page: int = 1,
     limit: int = 10,
     tag: Optional[str] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    cursor: Optional[str] = None
 ):
-    query = {"status": "published"}
-    
-    if tag:
-        query["tags"] = tag
-    
-    if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"excerpt": {"$regex": search, "$options": "i"}},
-            {"content": {"$regex": search, "$options": "i"}}
-        ]
-    
-    skip = (page - 1) * limit
-    
-    blogs = await db.blogs.find(query, {"_id": 0}).sort("published_at", -1).skip(skip).limit(limit).to_list(limit)
-    
-    for blog in blogs:
-        for field in ['created_at', 'updated_at', 'published_at']:
-            if blog.get(field) and isinstance(blog[field], str):
-                blog[field] = datetime.fromisoformat(blog[field])
-    
-    return [BlogListResponse(**blog) for blog in blogs]
+    page = max(1, page)
+    limit = max(1, min(limit, MAX_BLOG_PAGE_SIZE))
+    if cursor and search:
+        raise HTTPException(status_code=400, detail="Search results are paged by page number")
+    if search and (page - 1) * limit >= MAX_BLOG_SEARCH_RESULTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Search results are limited to the best {MAX_BLOG_SEARCH_RESULTS} matches; refine the search"
+        )
+    if not cursor and not search and page > MAX_BLOG_OFFSET_PAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Pages beyond {MAX_BLOG_OFFSET_PAGES} require the cursor from the previous page"
+        )
+
+    async def build():
+        query = {"status": "published"}
+        projection = BLOG_LIST_CACHE_PROJECTION
+        sort = [("published_at", -1), ("id", -1)]
+        skip = 0
+        
+        if tag:
+            query["tags"] = tag
+        
+        if search:
+            projection, sort = add_blog_text_search(query, projection, search)
+        
+        if cursor:
+            query.update(blog_cursor_filter(cursor))
+        else:
+            skip = (page - 1) * limit
+        # The last search page stops at the edge of the result window
+        fetch = min(limit + 1, MAX_BLOG_SEARCH_RESULTS - skip) if search else limit + 1
+        
+        blogs, total = await asyncio.gather(
+            db.blogs.find(query, projection).sort(sort).skip(skip).limit(fetch).to_list(fetch),
+            count_published_blogs(tag, search),
+        )
+        headers = {"X-Total-Count": str(total)}
+        if len(blogs) > limit:
+            blogs = blogs[:limit]
+            if not search:
+                headers["X-Next-Cursor"] = encode_cursor(blogs[-1].get('published_at'), blogs[-1]['id'])
+        return blogs, latest_update(blogs), headers
+
+    return await cached_blog_response(request, ("list", page, limit, tag, search, cursor), build)
 
 @api_router.get("/blogs/recent", response_model=List[BlogListResponse])
-async def get_recent_blogs():
-    blogs = await db.blogs.find(
-        {"status": "published"}, 
-        {"_id": 0}
-    ).sort("published_at", -1).limit(3).to_list(3)
-    
-    for blog in blogs:
-        for field in ['created_at', 'updated_at', 'published_at']:
-            if blog.get(field) and isinstance(blog[field], str):
-                blog[field] = datetime.fromisoformat(blog[field])
-    
-    return [BlogListResponse(**blog) for blog in blogs]
+async def get_recent_blogs(request: Request):
+    async def build():
+        blogs = await db.blogs.find(
+            {"status": "published"}, 
+            BLOG_LIST_CACHE_PROJECTION
+        ).sort("published_at", -1).limit(3).to_list(3)
+        return blogs, latest_update(blogs), {}
+
+    return await cached_blog_response(request, ("recent",), build)
 
 @api_router.get("/blogs/{slug}", response_model=BlogResponse)
-async def get_blog_by_slug(slug: str):
-    blog = await db.blogs.find_one({"slug": slug, "status": "published"}, {"_id": 0})
-    if not blog:
-        raise HTTPException(status_code=404, detail="Blog not found")
-    
-    # Increment view count
-    await db.blogs.update_one({"slug": slug}, {"$inc": {"view_count": 1}})
-    blog['view_count'] += 1
-    
-    for field in ['created_at', 'updated_at', 'published_at']:
-        if blog.get(field) and isinstance(blog[field], str):
-            blog[field] = datetime.fromisoformat(blog[field])
-    
-    return BlogResponse(**blog)
+async def get_blog_by_slug(slug: str, request: Request):
+    async def build():
+        blog = await db.blogs.find_one({"slug": slug, "status": "published"}, BLOG_DETAIL_PROJECTION)
+        if not blog:
+            raise HTTPException(status_code=404, detail="Blog not found")
+        return blog, latest_update([blog]), {}
+
+    response = await cached_blog_response(request, ("slug", slug), build)
+
+    # Count the view in memory; flush_blog_views writes the totals in one bulk_write
+    # (cached bodies carry the count as of when they were rendered)
+    BLOG_VIEW_BUFFER[slug] += 1
+    return response
+
+# Tag cloud counts, kept in blog_tags ({name, count}) by the admin blog routes instead of
+# aggregating every published blog per request
+def published_tags(blog: dict) -> list:
+    """Tags a blog contributes to the public tag counts (none unless it is published)"""
+    if blog.get("status") != "published":
+        return []
+    return list(set(blog.get("tags") or []))
+
+async def adjust_tag_counts(old_tags: list, new_tags: list):
+    """Apply the difference between a blog's published tags before and after a write"""
+    deltas = Counter(new_tags)
+    deltas.subtract(Counter(old_tags))
+    ops = [UpdateOne({"name": tag}, {"$inc": {"count": delta}}, upsert=True)
+           for tag, delta in deltas.items() if delta]
+    if not ops:
+        return
+    await db.blog_tags.bulk_write(ops, ordered=False)
+    await db.blog_tags.delete_many({"count": {"$lte": 0}})
+
+TAG_COUNTS_LEASE_SECONDS = 300
+
+async def rebuild_tag_counts() -> Optional[int]:
+    """Recompute blog_tags from the published blogs; None if another worker is already rebuilding"""
+    if not await acquire_lease("tag-counts", TAG_COUNTS_LEASE_SECONDS):
+        return None
+    try:
+        pipeline = [
+            {"$match": {"status": "published"}},
+            # A tag listed twice on one post counts once, as in published_tags
+            {"$project": {"tags": {"$setUnion": [{"$ifNull": ["$tags", []]}, []]}}},
+            {"$unwind": "$tags"},
+            {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+        ]
+        tags = await db.blogs.aggregate(pipeline).to_list(None)
+        # Upserts keyed on the unique name, so readers never see an empty or half-filled collection
+        if tags:
+            await db.blog_tags.bulk_write(
+                [UpdateOne({"name": tag["_id"]}, {"$set": {"count": tag["count"]}}, upsert=True) for tag in tags],
+                ordered=False
+            )
+        await db.blog_tags.delete_many({"name": {"$nin": [tag["_id"] for tag in tags]}})
+    finally:
+        await release_lease("tag-counts")
+    BLOG_RESPONSE_CACHE.clear()
+    return len(tags)
+
+async def backfill_blog_content():
+    """Process posts saved before process_blog_content existed, retiring the old HTML text index"""
+    planned = {index_name(spec) for spec in INDEX_PLAN["blogs"]}
+    for name, info in (await db.blogs.index_information()).items():
+        # Mongo allows one text index per collection, so the old one has to go first
+        if name not in planned and any(direction == "text" for _, direction in info["key"]):
+            try:
+                await db.blogs.drop_index(name)
+            except OperationFailure as e:
+                # IndexNotFound: every worker warms up at once and another one dropped it first
+                if e.code != 27:
+                    raise
+                continue
+            logger.info(f"Dropped superseded blog text index {name}")
+
+    def process_batch(blogs: List[dict]) -> List[UpdateOne]:
+        return [UpdateOne({"id": blog["id"]}, {"$set": process_blog_content(blog.get("content") or "")})
+                for blog in blogs]
+
+    # HTML parsing is CPU work: each batch is parsed in a thread so warm-up never holds the
+    # event loop for more than one bulk_write
+    processed = 0
+    cursor = db.blogs.find({"content_version": {"$ne": BLOG_CONTENT_VERSION}}, {"_id": 0, "id": 1, "content": 1})
+    while True:
+        blogs = await cursor.to_list(BLOG_BACKFILL_BATCH_SIZE)
+        if not blogs:
+            break
+        await db.blogs.bulk_write(await asyncio.to_thread(process_batch, blogs), ordered=False)
+        processed += len(blogs)
+    if processed:
+        logger.info(f"Processed content of {processed} existing blogs")
+
+async def ensure_tag_counts():
+    """Build blog_tags on first start (existing deployments have blogs but no counts yet)"""
+    try:
+        if await db.blog_tags.estimated_document_count() == 0:
+            rebuilt = await rebuild_tag_counts()
+            if rebuilt is not None:
+                logger.info(f"Rebuilt tag counts: {rebuilt} tags")
+    except Exception as e:
+        logger.error(f"Tag count rebuild failed: {e}")
+
+@api_router.post("/admin/blogs/tags/rebuild")
+async def rebuild_blog_tags(admin: dict = Depends(get_super_admin)):
+    rebuilt = await rebuild_tag_counts()
+    if rebuilt is None:
+        raise HTTPException(status_code=409, detail="Tag counts are already being rebuilt")
+    return {"success": True, "tags": rebuilt}
 
 @api_router.get("/blogs/tags/all")
-async def get_all_tags():
-    # code update by Subhro earlier code Fetches 10,000 documents to count tags now used aggregation pipeline
-    
-    pipeline = [
-        {"$match": {"status": "published"}},
-        {"$unwind": "$tags"},
-        {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$project": {"name": "$_id", "count": 1, "_id": 0}}
-    ]
-    tags = await db.blogs.aggregate(pipeline).to_list(None)
-    return tags
+async def get_all_tags(request: Request):
+    async def build():
+        tags = await db.blog_tags.find({}, {"_id": 0, "name": 1, "count": 1}).sort("count", -1).to_list(None)
+        return tags, None, {}
+
+    return await cached_blog_response(request, ("tags",), build)
 
 # Include the router in the main app
 app.include_router(api_router)
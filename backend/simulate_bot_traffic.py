@@ -1,12 +1,48 @@
+"""
+Synthetic traffic_logs generator, from a quick demo up to tens of millions of events.
+
+Documents look like what log_traffic writes (detect_bot and generate_fingerprint from
+server.py produce the detection fields) and are spread over many users and domains:
+
+    bot mix        --bot-ratio of events come from AI crawlers, picked by --bot-mix weights
+    diurnal        humans peak in the afternoon (UTC), crawlers lean towards the night
+    bursts         --burst-rate of crawler events arrive in runs of --burst-size requests a
+                   few seconds apart, labelled advanced-rag-crawler / llm-prefetch like
+                   analyze_behavior would
+    rotation       --rotation of crawlers switch between several identities (UA version,
+                   headers, IP block), i.e. fingerprints, every --rotate-every requests
+    domains        busy and quiet domains (Zipf-like share of traffic)
+
+Events are inserted with unordered insert_many batches, --concurrency batches in flight per
+process and --processes generating in parallel; throughput is reported as it goes. With
+TRAFFIC_LOG_PARTITIONING set, events go to the time partitions server.py would use.
+
+Without --users the events go to the first user's verified domains (creating example.com
+if there is none), as before. With --users N, N synthetic users with --domains-per-user
+verified domains each are created first.
+
+Usage:
+    python simulate_bot_traffic.py                                   # 50 events, first user
+    python simulate_bot_traffic.py --events 20000000 --users 500 --domains-per-user 4 \\
+        --days 90 --processes 4 --concurrency 8 --batch-size 5000
+    python simulate_bot_traffic.py --events 1000000 --users 50 --bot-mix GPTBot=5,ClaudeBot=3,CCBot=1
+"""
+import argparse
 import asyncio
+import bisect
+import math
+import multiprocessing
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+import random
+import sys
+import time
 import uuid
 from datetime import datetime, timezone, timedelta
-import random
-from dotenv import load_dotenv
 from pathlib import Path
 
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -32,88 +68,273 @@ NORMAL_AGENTS = [
 
 PATHS = ['/', '/about', '/blog', '/products', '/contact', '/api/data', '/articles/ai-guide', '/docs']
 
-async def simulate_traffic(user_id, domain_id):
-    mongo_url = os.environ['MONGO_URL']
-    db_name = os.environ['DB_NAME']
-    
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[db_name]
-    
-    logs = []
-    
-    # Generate 50 traffic logs
-    for i in range(50):
-        # 40% chance of bot traffic
-        is_bot = random.random() < 0.4
-        
-        if is_bot:
-            user_agent, provider, risk = random.choice(AI_BOTS)
-            detected_bot = user_agent.split('/')[0]
-            confidence = random.uniform(0.85, 0.95)
-            ip = f"{random.randint(13, 52)}.{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}"
-        else:
-            user_agent = random.choice(NORMAL_AGENTS)
-            detected_bot = None
-            provider = None
-            risk = 'unknown'
-            confidence = 0.0
-            ip = f"{random.randint(100, 200)}.{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}"
-        
-        # Random geo location
-        locations = [
-            {'country': 'United States', 'city': 'San Francisco', 'region': 'California', 'lat': 37.7749, 'lon': -122.4194, 'isp': 'Amazon AWS'},
-            {'country': 'United States', 'city': 'New York', 'region': 'New York', 'lat': 40.7128, 'lon': -74.0060, 'isp': 'Google Cloud'},
-            {'country': 'United Kingdom', 'city': 'London', 'region': 'England', 'lat': 51.5074, 'lon': -0.1278, 'isp': 'Microsoft Azure'},
-            {'country': 'Germany', 'city': 'Frankfurt', 'region': 'Hesse', 'lat': 50.1109, 'lon': 8.6821, 'isp': 'Hetzner'},
-            {'country': 'Singapore', 'city': 'Singapore', 'region': 'Central', 'lat': 1.3521, 'lon': 103.8198, 'isp': 'DigitalOcean'},
-        ]
-        
-        log = {
+LOCATIONS = [
+    {'country': 'United States', 'city': 'San Francisco', 'region': 'California', 'lat': 37.7749, 'lon': -122.4194, 'isp': 'Amazon AWS'},
+    {'country': 'United States', 'city': 'New York', 'region': 'New York', 'lat': 40.7128, 'lon': -74.0060, 'isp': 'Google Cloud'},
+    {'country': 'United Kingdom', 'city': 'London', 'region': 'England', 'lat': 51.5074, 'lon': -0.1278, 'isp': 'Microsoft Azure'},
+    {'country': 'Germany', 'city': 'Frankfurt', 'region': 'Hesse', 'lat': 50.1109, 'lon': 8.6821, 'isp': 'Hetzner'},
+    {'country': 'Singapore', 'city': 'Singapore', 'region': 'Central', 'lat': 1.3521, 'lon': 103.8198, 'isp': 'DigitalOcean'},
+]
+
+BROWSER_HEADERS = [
+    {"accept": "text/html,application/xhtml+xml", "accept-language": "en-US,en;q=0.9", "accept-encoding": "gzip, deflate, br"},
+    {"accept": "text/html,application/xhtml+xml", "accept-language": "de-DE,de;q=0.9", "accept-encoding": "gzip, deflate, br"},
+    {"accept": "text/html,*/*;q=0.8", "accept-language": "en-GB,en;q=0.8", "accept-encoding": "gzip, deflate"},
+]
+CRAWLER_HEADERS = [
+    {"accept": "*/*", "accept-encoding": "gzip"},
+    {"accept": "text/html", "accept-language": "en", "accept-encoding": "gzip, br"},
+    {"accept": "*/*"},
+]
+PLANS = ["free"] * 7 + ["pro"] * 2 + ["enterprise"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=50, help="traffic logs to insert")
+    parser.add_argument("--users", type=int, default=0, help="synthetic users to create (0: use the first user)")
+    parser.add_argument("--domains-per-user", type=int, default=3)
+    parser.add_argument("--days", type=int, default=7, help="spread events over this many past days")
+    parser.add_argument("--bot-ratio", type=float, default=0.4, help="share of events from AI crawlers")
+    parser.add_argument("--bot-mix", default="", help="crawler weights, e.g. GPTBot=5,ClaudeBot=3 (default: even)")
+    parser.add_argument("--burst-rate", type=float, default=0.3, help="share of crawler events that come in bursts")
+    parser.add_argument("--burst-size", type=int, default=60, help="mean requests per burst")
+    parser.add_argument("--rotation", type=float, default=0.3, help="share of crawlers rotating fingerprints")
+    parser.add_argument("--rotate-every", type=int, default=10, help="requests per identity for rotating crawlers")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many batches in flight per process")
+    parser.add_argument("--processes", type=int, default=1, help="generator processes")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def parse_bot_mix(spec: str) -> list:
+    """[(user agent, weight)] from "GPTBot=5,ClaudeBot=3"; names match user agents case-insensitively"""
+    if not spec:
+        return [(agent, 1.0) for agent, _, _ in AI_BOTS]
+    mix = []
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        agents = [agent for agent, _, _ in AI_BOTS if name.strip().lower() in agent.lower()]
+        if not agents:
+            agents = [f"Mozilla/5.0 (compatible; {name.strip()}/1.0)"]
+        mix.extend((agent, float(weight or 1) / len(agents)) for agent in agents)
+    return mix
+
+
+def cumulative(weights: list) -> list:
+    total = 0.0
+    result = []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+
+def hour_weights(peak_hour: int, floor: float) -> list:
+    """Relative traffic per UTC hour: a daily sine with its maximum at peak_hour"""
+    return [floor + (1 - floor) * (1 + math.cos((hour - peak_hour) / 24 * 2 * math.pi)) / 2 for hour in range(24)]
+
+
+class TrafficGenerator:
+    """Produces traffic_logs documents; one instance per process"""
+
+    def __init__(self, args, domains: list, seed: int):
+        import server  # detection and fingerprinting exactly as log_traffic does them
+
+        self.server = server
+        self.args = args
+        self.rng = random.Random(seed)
+        self.domains = domains
+        self.domain_weights = cumulative([1 / (i + 1) ** 0.8 for i in range(len(domains))])
+        self.now = datetime.now(timezone.utc)
+        self.human_hours = cumulative(hour_weights(15, 0.15))
+        self.bot_hours = cumulative(hour_weights(3, 0.6))
+        self.paths = PATHS + [f"/articles/{n}" for n in range(400)] + [f"/docs/page-{n}" for n in range(100)]
+        self.detections = {}
+        self.visitors = []
+        self.crawlers = self.make_crawlers(parse_bot_mix(args.bot_mix))
+        self.crawler_weights = cumulative([weight for _, weight in self.crawlers])
+        self.pending = []  # queued burst events
+
+        # A burst is drawn once but yields ~burst_size events; scale the draw probabilities
+        # so --burst-rate and --bot-ratio hold for events rather than draws
+        size, burst, bots = max(args.burst_size, 2), args.burst_rate, args.bot_ratio
+        self.burst_draw = burst / (size * (1 - burst) + burst) if burst < 1 else 1.0
+        per_draw = self.burst_draw * size + (1 - self.burst_draw)
+        self.bot_draw = bots / (per_draw * (1 - bots) + bots) if bots < 1 else 1.0
+
+    def detect(self, user_agent: str, ip: str) -> tuple:
+        key = user_agent
+        if key not in self.detections:
+            self.detections[key] = self.server.detect_bot(user_agent, ip)
+        return self.detections[key]
+
+    def make_identity(self, user_agent: str, headers: dict) -> dict:
+        block = f"{self.rng.randint(13, 52)}.{self.rng.randint(1, 255)}"
+        return {"ua": user_agent, "block": block,
+                "fingerprint": self.server.generate_fingerprint(user_agent, headers, f"{block}.0.1")}
+
+    def make_crawlers(self, mix: list) -> list:
+        crawlers = []
+        for agent, weight in mix:
+            # A few operators per bot, each crawling from its own address block
+            for _ in range(3):
+                rotating = self.rng.random() < self.args.rotation
+                identities = []
+                for version in range(6 if rotating else 1):
+                    variant = agent.replace("/1.0", f"/1.{version}") if version else agent
+                    identities.append(self.make_identity(variant, self.rng.choice(CRAWLER_HEADERS)))
+                crawlers.append(({"identities": identities, "geo": self.rng.choice(LOCATIONS)}, weight / 3))
+        return crawlers
+
+    def pick(self, cum_weights: list) -> int:
+        return bisect.bisect_left(cum_weights, self.rng.random() * cum_weights[-1])
+
+    def timestamp(self, hours: list) -> datetime:
+        day = self.now - timedelta(days=self.rng.randrange(self.args.days))
+        start = day.replace(hour=self.pick(hours), minute=0, second=0, microsecond=0)
+        ts = start + timedelta(seconds=self.rng.random() * 3600)
+        return ts if ts <= self.now else ts - timedelta(days=1)
+
+    def visitor(self) -> dict:
+        # Keep a pool of visitors so some come back; new ones replace random old ones
+        if len(self.visitors) < 50000 or self.rng.random() < 0.3:
+            agent = self.rng.choice(NORMAL_AGENTS) + f" Chrome/{self.rng.randint(110, 126)}.0.0.0 Safari/537.36"
+            ip = f"{self.rng.randint(100, 200)}.{self.rng.randint(1, 255)}.{self.rng.randint(1, 255)}.{self.rng.randint(1, 254)}"
+            visitor = {"ua": agent, "ip": ip, "geo": self.rng.choice(LOCATIONS),
+                       "fingerprint": self.server.generate_fingerprint(agent, self.rng.choice(BROWSER_HEADERS), ip)}
+            if len(self.visitors) < 50000:
+                self.visitors.append(visitor)
+            else:
+                self.visitors[self.rng.randrange(len(self.visitors))] = visitor
+            return visitor
+        return self.rng.choice(self.visitors)
+
+    def event(self, domain: dict, ts: datetime, user_agent: str, ip: str, fingerprint: str, geo: dict,
+              path: str, behavior: str) -> dict:
+        detected_bot, provider, confidence, risk = self.detect(user_agent, ip)
+        return {
             'id': str(uuid.uuid4()),
-            'domain_id': domain_id,
-            'user_id': user_id,
+            'domain_id': domain['id'],
+            'user_id': domain['user_id'],
             'ip_address': ip,
             'user_agent': user_agent,
             'detected_bot': detected_bot,
             'bot_provider': provider,
+            'fingerprint': fingerprint,
+            'behavior_type': behavior,
             'confidence_score': confidence,
             'risk_level': risk,
-            'geo_location': random.choice(locations),
-            'request_path': random.choice(PATHS),
+            'geo_location': geo,
+            'request_path': path,
             'request_method': 'GET',
-            'timestamp': (datetime.now(timezone.utc) - timedelta(hours=random.randint(0, 168))).isoformat()  # Last 7 days
+            'timestamp': ts,
         }
-        
-        logs.append(log)
-    
-    # Insert logs
-    if logs:
-        await db.traffic_logs.insert_many(logs)
-        print(f"✓ Created {len(logs)} traffic logs")
-        print(f"  - Bot requests: {sum(1 for log in logs if log['detected_bot'])}")
-        print(f"  - Normal requests: {sum(1 for log in logs if not log['detected_bot'])}")
-    
+
+    def crawler_ip(self, identity: dict) -> str:
+        return f"{identity['block']}.{self.rng.randint(0, 255)}.{self.rng.randint(1, 254)}"
+
+    def queue_burst(self):
+        crawler, _ = self.crawlers[self.pick(self.crawler_weights)]
+        domain = self.domains[self.pick(self.domain_weights)]
+        size = max(2, round(self.rng.expovariate(1 / max(self.args.burst_size, 2))))
+        # Wide bursts look like RAG crawling, narrow repeated ones like LLM prefetch
+        if self.rng.random() < 0.5:
+            paths, behavior = self.rng.sample(self.paths, min(len(self.paths), 30)), "advanced-rag-crawler"
+        else:
+            paths, behavior = self.rng.sample(self.paths, 3), "llm-prefetch"
+        if size <= 12:
+            behavior = "normal"
+        ts = self.timestamp(self.bot_hours)
+        identities = crawler["identities"]
+        for i in range(size):
+            identity = identities[(i // self.args.rotate_every) % len(identities)]
+            self.pending.append(self.event(domain, ts, identity["ua"], self.crawler_ip(identity),
+                                           identity["fingerprint"], crawler["geo"], self.rng.choice(paths), behavior))
+            ts += timedelta(seconds=self.rng.uniform(0.05, 3))
+
+    def next_event(self) -> dict:
+        if self.pending:
+            return self.pending.pop()
+        if self.rng.random() < self.bot_draw:
+            if self.rng.random() < self.burst_draw:
+                self.queue_burst()
+                return self.pending.pop()
+            crawler, _ = self.crawlers[self.pick(self.crawler_weights)]
+            identity = self.rng.choice(crawler["identities"])
+            return self.event(self.domains[self.pick(self.domain_weights)], self.timestamp(self.bot_hours),
+                              identity["ua"], self.crawler_ip(identity), identity["fingerprint"], crawler["geo"],
+                              self.rng.choice(self.paths), "normal")
+        visitor = self.visitor()
+        return self.event(self.domains[self.pick(self.domain_weights)], self.timestamp(self.human_hours),
+                          visitor["ua"], visitor["ip"], visitor["fingerprint"], visitor["geo"],
+                          self.rng.choice(self.paths), "normal")
+
+    def batch(self, size: int) -> dict:
+        """{collection name: documents}, grouped by the partition each event belongs to"""
+        batches = {}
+        for _ in range(size):
+            doc = self.next_event()
+            name = self.server.partition_name(doc['timestamp'])
+            doc['timestamp'] = doc['timestamp'].isoformat()
+            batches.setdefault(name, []).append(doc)
+        return batches
+
+
+async def insert_share(args, domains: list, count: int, seed: int, worker: int) -> dict:
+    """Generate and insert `count` events; runs once per process"""
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    generator = TrafficGenerator(args, domains, seed)
+    queue = asyncio.Queue(maxsize=args.concurrency * 2)
+    stats = {"inserted": 0, "bots": 0}
+    started = time.perf_counter()
+    last_report = started
+
+    async def inserter():
+        nonlocal last_report
+        while True:
+            batches = await queue.get()
+            if batches is None:
+                return
+            for name, docs in batches.items():
+                await db[name].insert_many(docs, ordered=False)
+                stats["inserted"] += len(docs)
+                stats["bots"] += sum(1 for doc in docs if doc['detected_bot'])
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                last_report = now
+                rate = stats["inserted"] / (now - started)
+                print(f"  [worker {worker}] {stats['inserted']:,}/{count:,} events, {rate:,.0f} events/s", flush=True)
+
+    inserters = [asyncio.create_task(inserter()) for _ in range(args.concurrency)]
+    remaining = count
+    while remaining:
+        size = min(args.batch_size, remaining)
+        await queue.put(generator.batch(size))
+        remaining -= size
+        await asyncio.sleep(0)  # let inserters pick up batches between generation steps
+    for _ in inserters:
+        await queue.put(None)
+    await asyncio.gather(*inserters)
     client.close()
+    stats["seconds"] = time.perf_counter() - started
+    return stats
 
-async def main():
-    mongo_url = os.environ['MONGO_URL']
-    db_name = os.environ['DB_NAME']
-    
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[db_name]
-    
-    # Get a user
+
+def run_share(args, domains: list, count: int, seed: int, worker: int) -> dict:
+    return asyncio.run(insert_share(args, domains, count, seed, worker))
+
+
+async def first_user_domains(db) -> list:
+    """The original behaviour: the first user's verified domains, creating example.com if needed"""
     user = await db.users.find_one({})
     if not user:
-        print("No users found. Please create a user first.")
-        client.close()
-        return
-    
-    # Get a verified domain
-    domain = await db.domains.find_one({'user_id': user['id'], 'is_verified': True})
-    if not domain:
+        return []
+    domains = await db.domains.find({'user_id': user['id'], 'is_verified': True}, {'_id': 0, 'id': 1, 'user_id': 1, 'domain': 1}).to_list(None)
+    if not domains:
         print("No verified domains found. Creating test domain...")
-        # Create a test domain
         domain = {
             'id': str(uuid.uuid4()),
             'user_id': user['id'],
@@ -125,12 +346,89 @@ async def main():
         }
         await db.domains.insert_one(domain)
         print(f"✓ Created verified test domain: {domain['domain']}")
-    
-    print(f"\nSimulating traffic for domain: {domain['domain']}")
-    await simulate_traffic(user['id'], domain['id'])
-    
+        domains = [domain]
+    return [{'id': d['id'], 'user_id': d['user_id'], 'domain': d['domain']} for d in domains]
+
+
+async def create_synthetic_tenants(db, users: int, domains_per_user: int, rng: random.Random) -> list:
+    run = uuid.uuid4().hex[:6]
+    now = datetime.now(timezone.utc).isoformat()
+    user_docs, domain_docs = [], []
+    for i in range(users):
+        user_id = str(uuid.uuid4())
+        user_docs.append({'id': user_id, 'email': f"synthetic-{run}-{i}@example.com", 'password_hash': None,
+                          'oauth_provider': None, 'is_super_admin': False, 'plan': rng.choice(PLANS),
+                          'created_at': now})
+        for j in range(domains_per_user):
+            domain_docs.append({'id': str(uuid.uuid4()), 'user_id': user_id, 'domain': f"site-{run}-{i}-{j}.example",
+                                'verification_token': str(uuid.uuid4()), 'is_verified': True,
+                                'verified_at': now, 'created_at': now})
+    await db.users.insert_many(user_docs)
+    await db.domains.insert_many(domain_docs)
+    print(f"✓ Created {users} synthetic users with {len(domain_docs)} verified domains (run {run})")
+    return [{'id': d['id'], 'user_id': d['user_id'], 'domain': d['domain']} for d in domain_docs]
+
+
+async def prepare(args) -> list:
+    import server
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    rng = random.Random(args.seed)
+    if args.users:
+        domains = await create_synthetic_tenants(db, args.users, args.domains_per_user, rng)
+    else:
+        domains = await first_user_domains(db)
+
+    # Time partitions the events will land in get their indexes before the load
+    if server.TRAFFIC_LOG_PARTITIONING:
+        now = datetime.now(timezone.utc)
+        names = {server.partition_name(now - timedelta(days=day)) for day in range(args.days + 1)}
+        await asyncio.gather(*(server.ensure_planned_indexes(db[name], server.INDEX_PLAN["traffic_logs"])
+                               for name in sorted(names)))
+        print(f"✓ Prepared {len(names)} {server.TRAFFIC_LOG_PARTITIONING} partitions")
+    client.close()
+    return domains
+
+
+async def update_counters(inserted: int, bots: int):
+    """Keep the admin dashboard totals (counters collection) in step with the inserted events"""
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    # Until server.py has seeded the counters (seeded: False) its seed will count these logs itself
+    await db.counters.update_one({"_id": "traffic_totals", "seeded": {"$ne": False}},
+                                 {"$inc": {"total_logs": inserted, "bot_detections": bots}})
     client.close()
-    print("\n✓ Traffic simulation complete!")
+
+
+def main():
+    args = parse_args()
+    domains = asyncio.run(prepare(args))
+    if not domains:
+        print("No users found. Please create a user first (or pass --users N).")
+        return
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    processes = max(1, min(args.processes, args.events))
+    shares = [args.events // processes + (1 if i < args.events % processes else 0) for i in range(processes)]
+    print(f"\nGenerating {args.events:,} events over {len(domains)} domains and {args.days} days "
+          f"({processes} processes x {args.concurrency} concurrent batches of {args.batch_size})")
+
+    started = time.perf_counter()
+    if processes == 1:
+        results = [run_share(args, domains, shares[0], seed, 0)]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.starmap(run_share, [(args, domains, share, seed + i, i) for i, share in enumerate(shares)])
+    elapsed = time.perf_counter() - started
+
+    inserted = sum(result["inserted"] for result in results)
+    bots = sum(result["bots"] for result in results)
+    asyncio.run(update_counters(inserted, bots))
+    print(f"\n✓ Created {inserted:,} traffic logs in {elapsed:.1f}s ({inserted / elapsed:,.0f} events/s)")
+    print(f"  - Bot requests: {bots:,}")
+    print(f"  - Normal requests: {inserted - bots:,}")
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Script to exercise domain verification against a local stub DNS and HTTP server
+
+Starts a UDP nameserver and an HTTP server on 127.0.0.1, points the verification
+settings of server.py at them (VERIFY_DNS_NAMESERVERS, VERIFY_DNS_PORT, VERIFY_FILE_URL)
+and runs check_domain_ownership through these cases:
+
+    dns-match     TXT record carries the token
+    file-match    no TXT record, verification file carries the token
+    redirect      verification file reached through a 301 (like http->https or apex->www)
+    mismatch      TXT record and file with the wrong token
+    missing       NXDOMAIN and HTTP 404
+    slow-dns      nameserver answers after the DNS timeout
+
+While the checks run, a heartbeat task measures how late the event loop wakes up, so
+a check that blocks the loop shows up as a large max lag. Exits 1 if any case fails.
+No database is needed.
+
+Usage:
+    python verify_domain_checks.py [--dns-timeout 1.0] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--dns-timeout", type=float, default=1.0, help="resolver timeout in seconds")
+parser.add_argument("--concurrency", type=int, default=50, help="concurrent checks of the slow case")
+args = parser.parse_args()
+
+TOKEN = "stub-token"
+# domain -> (TXT records or None for NXDOMAIN, answer delay in seconds)
+DNS_ZONE = {
+    "dns-match.test.": ([f"aibot-detect={TOKEN}", "v=spf1 -all"], 0),
+    "file-match.test.": ([], 0),
+    "redirect.test.": ([], 0),
+    "mismatch.test.": (["aibot-detect=other"], 0),
+    "slow-dns.test.": ([f"aibot-detect={TOKEN}"], args.dns_timeout * 3),
+}
+# domain -> (HTTP status, body); a 301 body is the path to redirect to
+FILES = {
+    "file-match.test": (200, TOKEN),
+    "redirect.test": (301, "/file-match.test/.well-known/aibot-detect.txt"),
+    "mismatch.test": (200, "other"),
+    "slow-dns.test": (404, ""),
+}
+
+
+class StubDNS(asyncio.DatagramProtocol):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        asyncio.get_running_loop().create_task(self.answer(data, addr))
+
+    async def answer(self, data, addr):
+        query = dns.message.from_wire(data)
+        question = query.question[0]
+        response = dns.message.make_response(query)
+        records, delay = DNS_ZONE.get(question.name.to_text().lower(), (None, 0))
+        if records is None:
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        elif question.rdtype == dns.rdatatype.TXT and records:
+            response.answer.append(dns.rrset.from_text_list(
+                question.name, 60, "IN", "TXT", [f'"{record}"' for record in records]
+            ))
+        if delay:
+            await asyncio.sleep(delay)
+        self.transport.sendto(response.to_wire(), addr)
+
+
+class StubFiles(BaseHTTPRequestHandler):
+    def do_GET(self):
+        domain = self.path.strip("/").split("/")[0]
+        status, body = FILES.get(domain, (404, "not found"))
+        self.send_response(status)
+        if status == 301:
+            self.send_header("Location", body)
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *_):
+        pass
+
+
+async def heartbeat(lags: list, stop: asyncio.Event, interval: float = 0.01):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def main() -> int:
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(StubDNS, local_addr=("127.0.0.1", 0))
+    dns_port = transport.get_extra_info("sockname")[1]
+    http_server = ThreadingHTTPServer(("127.0.0.1", 0), StubFiles)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "aibot_detect_stub")
+    os.environ.setdefault("JWT_SECRET", "stub")
+    os.environ["VERIFY_DNS_NAMESERVERS"] = "127.0.0.1"
+    os.environ["VERIFY_DNS_PORT"] = str(dns_port)
+    os.environ["VERIFY_DNS_TIMEOUT_SECONDS"] = str(args.dns_timeout)
+    os.environ["VERIFY_FILE_URL"] = f"http://127.0.0.1:{http_server.server_port}/{{domain}}/.well-known/aibot-detect.txt"
+    import server
+
+    server.get_verify_http_client()  # done by lifespan in the app
+
+    def domain(name):
+        return {"id": name, "domain": name, "verification_token": TOKEN}
+
+    cases = [
+        ("dns-match", "DNS"),
+        ("file-match", "FILE"),
+        ("redirect", "FILE"),
+        ("mismatch", None),
+        ("missing", None),
+    ]
+    failures = 0
+    lags, stop = [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+
+    for name, expected in cases:
+        method, errors = await server.check_domain_ownership(domain(f"{name}.test"))
+        ok = method == expected
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<11} method={method} errors={errors}")
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        server.check_domain_ownership(domain("slow-dns.test")) for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    timed_out = all(method is None and any("timed out" in error for error in errors) for method, errors in results)
+    failures += not timed_out
+    print(f"{'ok  ' if timed_out else 'FAIL'} {'slow-dns':<11} {args.concurrency} checks in {elapsed:.2f}s "
+          f"(timeout {args.dns_timeout}s, one shared query)")
+
+    stop.set()
+    await beat
+    max_lag = max(lags) * 1000
+    blocked = max_lag > 100
+    failures += blocked
+    print(f"{'FAIL' if blocked else 'ok  '} event loop max lag {max_lag:.1f} ms over {len(lags)} heartbeats")
+
+    transport.close()
+    http_server.shutdown()
+    if server.VERIFY_HTTP_CLIENT is not None:
+        await server.VERIFY_HTTP_CLIENT.aclose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
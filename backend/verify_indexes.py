@@ -0,0 +1,100 @@
+"""
+Script to check the database against the index plan in server.py
+
+Creates any missing planned indexes, runs explain() on the query shape of every
+endpoint (QUERY_SHAPES) and reports collection scans, in-memory sorts, indexes that
+have not been used since the server started and indexes that are not in the plan.
+It also checks that blog search finds a post by a substring of its CJK text, on a
+scratch collection with the blogs indexes that is dropped afterwards.
+
+Usage:
+    python verify_indexes.py                   # report only
+    python verify_indexes.py --drop-redundant  # also drop indexes not in the plan
+"""
+import argparse
+import asyncio
+import sys
+
+import server
+
+
+BLOG_SEARCH_CHECK_COLLECTION = "blog_search_check"
+BLOG_SEARCH_CHECK_CONTENT = "<p>我们的数据分析很好</p><p>データベースの設計</p><p>한국어 검색</p><p>Index planning</p>"
+BLOG_SEARCH_CHECK_TERMS = ["数据", "数据分析", "分", "データ", "검색", "planning"]
+
+
+async def check_blog_search() -> int:
+    """Search a scratch post for substrings of its text; returns the number of terms that missed it"""
+    collection = server.db[BLOG_SEARCH_CHECK_COLLECTION]
+    await collection.drop()
+    try:
+        await server.ensure_planned_indexes(collection, server.INDEX_PLAN["blogs"])
+        await collection.insert_one({
+            "id": "blog-search-check", "slug": "blog-search-check", "title": "Search check", "excerpt": "",
+            **server.process_blog_content(BLOG_SEARCH_CHECK_CONTENT),
+        })
+        misses = 0
+        for term in BLOG_SEARCH_CHECK_TERMS:
+            query = {}
+            server.add_blog_text_search(query, {}, term)
+            found = await collection.count_documents(query)
+            misses += not found
+            print(f"  {'✓' if found else '✗'} {term}")
+        return misses
+    finally:
+        await collection.drop()
+
+
+async def verify(drop_redundant: bool) -> int:
+    await server.load_traffic_partitions()
+    await server.apply_index_plan()
+
+    problems = 0
+    print("Query plans")
+    for shape in server.QUERY_SHAPES:
+        report = await server.explain_query_shape(shape)
+        flags = []
+        if report["collscan"]:
+            flags.append("COLLSCAN")
+        if report["in_memory_sort"]:
+            flags.append("IN-MEMORY SORT")
+        problems += bool(flags)
+        mark = "✗" if flags else "✓"
+        indexes = ", ".join(report["indexes"]) or "-"
+        print(f"  {mark} {report['endpoint']:<36} {report['collection']:<14} {indexes:<48} {' '.join(flags)}")
+
+    unused = await server.unused_indexes()
+    print("\nIndexes unused since server start")
+    for collection, names in unused.items():
+        print(f"  {collection}: {', '.join(names)}")
+    if not unused:
+        print("  none")
+
+    redundant = await server.redundant_indexes()
+    print("\nIndexes not in the plan")
+    for collection, names in redundant.items():
+        print(f"  {collection}: {', '.join(names)}")
+        if drop_redundant:
+            for name in names:
+                await server.db[collection].drop_index(name)
+                print(f"    dropped {name}")
+    if not redundant:
+        print("  none")
+
+    print("\nBlog search")
+    problems += await check_blog_search()
+
+    server.client.close()
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drop-redundant", action="store_true", help="drop indexes that are not in the plan")
+    args = parser.parse_args()
+    problems = asyncio.run(verify(args.drop_redundant))
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -222,7 +222,15 @@ export default function Domains() {
 
                     <div className="text-sm text-gray-400">
                       Added: {new Date(domain.created_at).toLocaleDateString()}
+                      {domain.last_checked_at && (
+                        <span> · Last checked: {new Date(domain.last_checked_at).toLocaleString()}</span>
+                      )}
                     </div>
+                    {!domain.is_verified && domain.last_check_errors?.length > 0 && (
+                      <div className="text-sm text-yellow-400/80 mt-1" data-testid="last-check-errors">
+                        {domain.last_check_errors.join(' | ')}
+                      </div>
+                    )}
                   </div>
 
                   <div className="flex items-center space-x-2 ml-4">
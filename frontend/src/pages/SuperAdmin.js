@@ -9,12 +9,16 @@ import { Users, Globe, Activity, TrendingUp, Shield, AlertCircle } from 'lucide-
 import { Button } from '@/components/ui/button';
 import { useNavigate } from 'react-router-dom';
 
+const DOMAIN_PAGE_SIZE = 100;
+
 export default function SuperAdmin() {
   const navigate = useNavigate();
   const user = getUser();
   const [stats, setStats] = useState(null);
   const [users, setUsers] = useState([]);
   const [domains, setDomains] = useState([]);
+  const [domainPage, setDomainPage] = useState(1);
+  const [domainTotal, setDomainTotal] = useState(0);
   const [selectedUser, setSelectedUser] = useState(null);
   const [userActivity, setUserActivity] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -67,12 +71,15 @@ export default function SuperAdmin() {
     }
   };
 
-  const fetchAllDomains = async () => {
+  const fetchAllDomains = async (page = domainPage) => {
     try {
       const response = await axios.get(`${API}/admin/domains`, {
+        params: { page, limit: DOMAIN_PAGE_SIZE },
         headers: { Authorization: `Bearer ${getAuthToken()}` }
       });
       setDomains(response.data);
+      setDomainTotal(parseInt(response.headers['x-total-count'] || response.data.length, 10));
+      setDomainPage(page);
     } catch (error) {
       toast.error('Failed to fetch domains');
       throw error;
@@ -306,6 +313,23 @@ export default function SuperAdmin() {
                   </tbody>
                 </table>
               </div>
+              {domainTotal > DOMAIN_PAGE_SIZE && (
+                <div className="flex items-center justify-between mt-4" data-testid="domains-pagination">
+                  <span className="text-sm text-gray-400">
+                    {(domainPage - 1) * DOMAIN_PAGE_SIZE + 1}-{Math.min(domainPage * DOMAIN_PAGE_SIZE, domainTotal)} of {domainTotal}
+                  </span>
+                  <div className="flex gap-2">
+                    <Button variant="outline" size="sm" disabled={domainPage === 1}
+                      onClick={() => fetchAllDomains(domainPage - 1)}>
+                      Previous
+                    </Button>
+                    <Button variant="outline" size="sm" disabled={domainPage * DOMAIN_PAGE_SIZE >= domainTotal}
+                      onClick={() => fetchAllDomains(domainPage + 1)}>
+                      Next
+                    </Button>
+                  </div>
+                </div>
+              )}
             </Card>
           </TabsContent>
 
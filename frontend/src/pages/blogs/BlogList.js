@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { Search, Shield, ArrowLeft } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
@@ -13,6 +13,9 @@ const BlogList = () => {
   const [searchTerm, setSearchTerm] = useState('');
   const [selectedTag, setSelectedTag] = useState('');
   const [page, setPage] = useState(1);
+  const [total, setTotal] = useState(null);
+  // Cursor for each page, keyed by tag and page; deep pages are fetched by cursor
+  const cursors = useRef({});
   const navigate = useNavigate();
 
   const API_URL = process.env.REACT_APP_BACKEND_URL || 'http://localhost:8000';
@@ -24,11 +27,19 @@ const BlogList = () => {
 
   const fetchBlogs = async () => {
     try {
-      const params = { page, limit: 9 };
+      const params = { limit: 9 };
+      const cursor = cursors.current[`${selectedTag}:${page}`];
+      if (cursor && !searchTerm) params.cursor = cursor;
+      else params.page = page;
       if (selectedTag) params.tag = selectedTag;
       if (searchTerm) params.search = searchTerm;
 
       const response = await axios.get(`${API_URL}/api/blogs`, { params });
+      const nextCursor = response.headers['x-next-cursor'];
+      if (nextCursor) cursors.current[`${selectedTag}:${page + 1}`] = nextCursor;
+      // Search results stop at the server's result window; the count reflects that cap
+      const totalCount = response.headers['x-total-count'];
+      setTotal(totalCount !== undefined ? parseInt(totalCount, 10) : null);
       setBlogs(response.data);
     } catch (error) {
       console.error('Error fetching blogs:', error);
@@ -181,7 +192,7 @@ const BlogList = () => {
                     <span className="px-4 py-2 text-white">Page {page}</span>
                     <button
                       onClick={() => setPage(page + 1)}
-                      disabled={blogs.length < 9}
+                      disabled={blogs.length < 9 || (total !== null && page * 9 >= total)}
                       className="px-4 py-2 bg-white/5 border border-white/10 rounded-lg hover:bg-white/10 disabled:opacity-50 disabled:cursor-not-allowed text-white transition-colors"
                     >
                       Next